@@ -15,6 +15,15 @@ def create_app(config_class=Config):
     db.init_app(app)
     login.init_app(app)
 
+    from app.services.settings_cache import SettingsCache
+    SettingsCache.init_app(app)
+    from app.services.dashboard_service import DashboardService
+    DashboardService.init_app(app)
+    from app.services.report_job_service import ReportJobService
+    ReportJobService.init_app(app)
+    from app.utils.rate_limiter import LoginLimiter
+    LoginLimiter.init_app(app)
+
     # Register Blueprints
     from app.modules.dashboard.routes import bp as dashboard_bp
     from app.modules.reports.routes import bp as reports_bp
@@ -36,12 +45,11 @@ def create_app(config_class=Config):
     app.register_blueprint(sales_bp)
     app.register_blueprint(inventory_bp)
 
-    from app.models import Setting
+    from app.services.pricing_service import PricingService
     @app.context_processor
     def inject_rate():
         try:
-            s = Setting.query.get('exchange_rate')
-            rate = float(s.value) if s else 1.0
+            rate = PricingService.current_rate()
         except:
             rate = 1.0
         return dict(current_rate=rate)
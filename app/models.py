@@ -1,5 +1,7 @@
+from datetime import datetime
 from app import db, login
 from flask_login import UserMixin
+from sqlalchemy.ext.hybrid import hybrid_property
 from werkzeug.security import generate_password_hash, check_password_hash
 
 @login.user_loader
@@ -38,7 +40,6 @@ class Product(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     quantity = db.Column(db.Integer, nullable=False, default=0)
-    price = db.Column(db.Float, nullable=False, default=0.0)
     price_usd = db.Column(db.Float, nullable=True, default=0.0)
     category_id = db.Column(db.Integer, db.ForeignKey('category.id'), nullable=True)
     
@@ -52,6 +53,29 @@ class Product(db.Model):
     brand = db.Column(db.String(50), nullable=True)
     vehicle_type = db.Column(db.String(20), nullable=True) # 'Auto', 'Moto', etc.
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # quantity <= min_stock, maintained by InventoryService and LowStockService
+    # so the alert can use an index instead of comparing two columns per row
+    is_low_stock = db.Column(db.Boolean, default=False, nullable=False)
+    low_stock_since = db.Column(db.DateTime, nullable=True)
+    # Last write to the row (ORM or Core UPDATE); part of the report data version
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_product_low_stock', 'low_stock_since', 'id',
+                 sqlite_where=db.text('is_active = 1 AND is_low_stock = 1'),
+                 postgresql_where=db.text('is_active AND is_low_stock')),
+    )
+
+    @hybrid_property
+    def price(self):
+        """Bs price, derived from price_usd and the active exchange rate"""
+        from app.services.pricing_service import PricingService
+        return (self.price_usd or 0) * PricingService.current_rate()
+
+    @price.expression
+    def price(cls):
+        from app.services.pricing_service import PricingService
+        return PricingService.price_expression()
 
     def to_dict(self):
         return {
@@ -71,6 +95,19 @@ class Product(db.Model):
             'min_stock': self.min_stock
         }
 
+class ProductCompatibility(db.Model):
+    """Normalized vehicle fitment parsed from Product.compatibility (see CompatibilityService)"""
+    id = db.Column(db.Integer, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False, index=True)
+    make = db.Column(db.String(50), nullable=False)  # Lowercase, e.g. 'toyota'
+    model = db.Column(db.String(50), nullable=True)  # NULL = any model of the make
+    year_from = db.Column(db.Integer, nullable=True)  # NULL = open range
+    year_to = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_product_compatibility_vehicle', 'make', 'model', 'year_from', 'year_to'),
+    )
+
 class InventoryMovement(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('product.id'), nullable=False)
@@ -83,13 +120,43 @@ class InventoryMovement(db.Model):
     product = db.relationship('Product', backref=db.backref('movements', lazy=True))
     user = db.relationship('User', backref=db.backref('movements', lazy=True))
 
+    __table_args__ = (
+        db.Index('ix_inventory_movement_product_date', 'product_id', 'date'),
+        db.Index('ix_inventory_movement_date', 'date'),
+    )
+
+class ProductActivity(db.Model):
+    """
+    Denormalized rotation summary, one row per product that ever moved.
+    Maintained by InventoryService; rebuild with rebuild_product_activity.py.
+    The units_out_* windows only grow between rebuilds, so the rebuild is
+    meant to run nightly; windows_as_of says when they were last exact.
+    """
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    last_movement_at = db.Column(db.DateTime, nullable=True, index=True)
+    last_sale_at = db.Column(db.DateTime, nullable=True)
+    units_out_30 = db.Column(db.Integer, nullable=False, default=0)
+    units_out_60 = db.Column(db.Integer, nullable=False, default=0)
+    units_out_90 = db.Column(db.Integer, nullable=False, default=0)
+    windows_as_of = db.Column(db.DateTime, nullable=True)
+
+    product = db.relationship('Product', backref=db.backref('activity', uselist=False, lazy=True))
+
+class ExchangeRate(db.Model):
+    """Bs/USD rate history. The active rate is the latest one with effective_at <= now."""
+    id = db.Column(db.Integer, primary_key=True)
+    rate = db.Column(db.Float, nullable=False)
+    effective_at = db.Column(db.DateTime, nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+
 class Setting(db.Model):
     key = db.Column(db.String(50), primary_key=True)
     value = db.Column(db.String(100))
 
 class Sale(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    date = db.Column(db.DateTime, default=db.func.current_timestamp())
+    date = db.Column(db.DateTime, default=db.func.current_timestamp(), index=True)
     total_bs = db.Column(db.Float, nullable=False, default=0.0)
     total_usd = db.Column(db.Float, nullable=False, default=0.0)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)  # Track who created the sale
@@ -105,12 +172,66 @@ class SaleItem(db.Model):
     price_at_moment_bs = db.Column(db.Float, nullable=False)
     price_at_moment_usd = db.Column(db.Float, nullable=False)
 
+class SalesDaily(db.Model):
+    """Sales totals per day, maintained by SalesService.create_sale.
+    Rebuild with rebuild_sales_rollup.py."""
+    day = db.Column(db.Date, primary_key=True)
+    sale_count = db.Column(db.Integer, nullable=False, default=0)
+    total_usd = db.Column(db.Float, nullable=False, default=0.0)
+    total_bs = db.Column(db.Float, nullable=False, default=0.0)
+
+class SalesDailyItem(db.Model):
+    """Units and totals per day, product and seller (user_id 0 = unknown)."""
+    day = db.Column(db.Date, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('product.id'), primary_key=True)
+    user_id = db.Column(db.Integer, primary_key=True, default=0)
+    units = db.Column(db.Integer, nullable=False, default=0)
+    total_usd = db.Column(db.Float, nullable=False, default=0.0)
+    total_bs = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.Index('ix_sales_daily_item_product_day', 'product_id', 'day'),
+    )
+
+class ReportJob(db.Model):
+    """A report rendered in the background; the finished file is cached on disk"""
+    id = db.Column(db.Integer, primary_key=True)
+    report_type = db.Column(db.String(30), nullable=False)  # 'inventory', 'sales', 'month_end'
+    params = db.Column(db.Text, nullable=False, default='{}')  # JSON
+    # sha256 of (report_type, params, data version); also the cached file name
+    cache_key = db.Column(db.String(64), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='queued')  # 'queued', 'running', 'done', 'failed'
+    progress = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    error = db.Column(db.String(200), nullable=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    created_at = db.Column(db.DateTime, default=db.func.current_timestamp())
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'report_type': self.report_type,
+            'status': self.status,
+            'progress': self.progress,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
 class LoginAttempt(db.Model):
     """Track login attempts for security monitoring and rate limiting"""
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(64), nullable=False, index=True)  # Not FK to track non-existent users too
+    username = db.Column(db.String(64), nullable=False)  # Not FK to track non-existent users too
     ip_address = db.Column(db.String(45), nullable=True)  # IPv6 can be up to 45 chars
     timestamp = db.Column(db.DateTime, default=db.func.current_timestamp(), nullable=False, index=True)
     success = db.Column(db.Boolean, default=False, nullable=False)
     user_agent = db.Column(db.String(256), nullable=True)  # Browser/device info
 
+    # Serve the per-username and per-IP failure counts of get_failed_attempts (audit and
+    # ad-hoc lookups; the login limiter reads LoginAttempt once, through the timestamp index)
+    __table_args__ = (
+        db.Index('ix_login_attempt_username_success_timestamp', 'username', 'success', 'timestamp'),
+        db.Index('ix_login_attempt_ip_success_timestamp', 'ip_address', 'success', 'timestamp'),
+    )
+
@@ -1,20 +1,167 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context
 from app.models import Product, Setting, Sale
+from app.services.product_service import ProductService
+from app.services.search_service import SearchService
+from app.services.compatibility_service import CompatibilityService
+from app.services.inventory_service import InventoryService
+from app.services.pricing_service import PricingService
+from app.services.settings_cache import SettingsCache
+from app.services.dashboard_service import DashboardService
+from app.services.low_stock_service import LowStockService
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.valuation_service import ValuationService
 from app import db
 from flask_login import login_required, current_user
-from datetime import datetime, timedelta
+from datetime import datetime, date, timedelta
+import json
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
-def get_rate():
-    s = Setting.query.get('exchange_rate')
-    return float(s.value) if s else 1.0
+MAX_PAGE_SIZE = 1000
+MAX_STATS_DAYS = 3 * 366
+
+def _product_summary(p):
+    return {
+        'id': p.id,
+        'name': p.name,
+        'part_number': p.part_number,
+        'manufacturer': p.manufacturer,
+        'quantity': p.quantity,
+        'price_usd': p.price_usd
+    }
 
 @bp.route('/products', methods=['GET'])
 @login_required
 def get_products():
-    products = Product.query.all()
-    return jsonify([p.to_dict() for p in products])
+    """
+    Lists products.
+
+    Query params:
+        fields: Comma-separated projection (default: every to_dict() key).
+        after: Keyset cursor, the last product id already received.
+        limit: Page size (max MAX_PAGE_SIZE). Returns {'items', 'next_cursor'}.
+        format: 'ndjson' streams one object per line (`limit` rows at most, uncapped).
+
+    Without `limit` the full catalog is streamed as a JSON array built row by row.
+    """
+    try:
+        fields = ProductService.parse_fields(request.args.get('fields'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', type=int)
+    output_format = request.args.get('format', 'json')
+
+    if limit is not None and output_format != 'ndjson':
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        # Fetch one extra row to know whether another page exists
+        rows = list(ProductService.iter_rows(fields, after_id=after, limit=limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return jsonify({
+            'items': [row for _, row in rows],
+            'next_cursor': rows[-1][0] if has_more else None
+        })
+
+    if limit is not None:
+        limit = max(1, limit)  # 0 or a negative LIMIT would stream the whole catalog
+    rows = ProductService.iter_rows(fields, after_id=after, limit=limit)
+
+    if output_format == 'ndjson':
+        def generate():
+            for _, row in rows:
+                yield json.dumps(row) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    def generate():
+        yield '['
+        first = True
+        for _, row in rows:
+            if not first:
+                yield ','
+            first = False
+            yield json.dumps(row)
+        yield ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@bp.route('/products/search', methods=['GET'])
+@login_required
+def search_products():
+    """Ranked type-ahead search. Params: q, page (1-based), per_page (max 50)."""
+    search_query = request.args.get('q', '').strip()
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 20, type=int), 50))
+
+    if not search_query:
+        return jsonify({'items': [], 'page': page, 'per_page': per_page, 'has_more': False})
+
+    # Fetch one extra row to know whether another page exists
+    products = SearchService.search(search_query, limit=per_page + 1, offset=(page - 1) * per_page)
+    has_more = len(products) > per_page
+
+    return jsonify({
+        'items': [_product_summary(p) for p in products[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more
+    })
+
+@bp.route('/products/fits', methods=['GET'])
+@login_required
+def products_fitting_vehicle():
+    """Parts that fit a vehicle. Params: make (required), model, year, page, per_page (max 100)."""
+    make = request.args.get('make', '').strip()
+    if not make:
+        return jsonify({'error': 'Missing make'}), 400
+
+    model = request.args.get('model')
+    year = request.args.get('year', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 100))
+
+    products = CompatibilityService.fits_query(make, model, year).offset(
+        (page - 1) * per_page
+    ).limit(per_page + 1).all()
+    has_more = len(products) > per_page
+
+    return jsonify({
+        'items': [_product_summary(p) for p in products[:per_page]],
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more
+    })
+
+@bp.route('/products/low-stock', methods=['GET'])
+@login_required
+def low_stock_products():
+    """
+    Active products at or below min_stock, oldest alert first.
+
+    Query params:
+        since: ISO date; only products that became low at or after it
+            (a "newly low" feed for reorder automation).
+        after: Keyset cursor (next_cursor of the previous page).
+        limit: Page size (max MAX_PAGE_SIZE, default 100).
+    """
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'error': 'Invalid date'}), 400
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE))
+
+    try:
+        products, next_cursor = LowStockService.feed(since=since or None, after=request.args.get('after'), limit=limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'items': [dict(_product_summary(p), min_stock=p.min_stock,
+                       low_stock_since=p.low_stock_since.isoformat()) for p in products],
+        'next_cursor': next_cursor
+    })
 
 @bp.route('/products', methods=['POST'])
 @login_required
@@ -31,13 +178,9 @@ def add_product():
     if not name:
         return jsonify({'error': 'Missing name'}), 400
         
-    rate = get_rate()
-    price_ves = float(price_usd) * rate
-    
     new_product = Product(
         name=name,
         quantity=int(quantity),
-        price=price_ves,
         price_usd=float(price_usd)
     )
     
@@ -58,27 +201,144 @@ def delete_product(id):
     
     return jsonify({'success': True})
 
+@bp.route('/inventory/movements', methods=['POST'])
+@login_required
+def apply_inventory_movements():
+    """
+    Applies a batch of stock movements (e.g. a supplier delivery).
+    Body: {'movements': [{'product_id', 'action', 'quantity', 'description'}], 'description', 'atomic'}
+    """
+    if not current_user.has_role('admin'):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json()
+    if not data or not data.get('movements'):
+        return jsonify({'error': 'No movements provided'}), 400
+
+    try:
+        summary = InventoryService.apply_movements(
+            data['movements'],
+            current_user.id,
+            description=data.get('description'),
+            atomic=data.get('atomic', True)
+        )
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(summary)
+
+@bp.route('/inventory/stock-count', methods=['POST'])
+@login_required
+def apply_stock_count():
+    """
+    Sets counted stock for many products. Body: {'counts': {product_id: qty}, 'description', 'atomic'}
+    """
+    if not current_user.has_role('admin'):
+        return jsonify({'error': 'Unauthorized'}), 403
+
+    data = request.get_json()
+    if not data or not data.get('counts'):
+        return jsonify({'error': 'No counts provided'}), 400
+
+    try:
+        summary = InventoryService.set_stock_bulk(
+            data['counts'],
+            data.get('description'),
+            current_user.id,
+            atomic=data.get('atomic', True)
+        )
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify(summary)
+
+@bp.route('/inventory/valuation', methods=['GET'])
+@login_required
+def get_inventory_valuation():
+    """
+    Value of active stock (quantity * price_usd) with subtotals per category
+    and per location, computed with SQL aggregates.
+    """
+    return jsonify(ValuationService.summary())
+
+@bp.route('/exchange-rates', methods=['GET'])
+@login_required
+def get_exchange_rates():
+    """Rate history, newest first. Optional `at` (ISO date) returns the rate in effect then."""
+    at = request.args.get('at')
+    if at:
+        try:
+            when = datetime.fromisoformat(at)
+        except ValueError:
+            return jsonify({'error': 'Invalid date'}), 400
+        return jsonify({'at': when.isoformat(), 'rate': PricingService.rate_at(when)})
+
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    return jsonify([{
+        'rate': r.rate,
+        'effective_at': r.effective_at.isoformat(),
+        'user_id': r.user_id
+    } for r in PricingService.history(limit)])
+
+@bp.route('/settings/cache-stats', methods=['GET'])
+@login_required
+def get_settings_cache_stats():
+    if not current_user.has_role('admin'):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return jsonify(SettingsCache.current().stats())
+
+@bp.route('/dashboard/metrics', methods=['GET'])
+@login_required
+def get_dashboard_metrics():
+    """Cached dashboard aggregates. `computed_at` tells how fresh they are."""
+    return jsonify(DashboardService.metrics())
+
 @bp.route('/sales/stats', methods=['GET'])
 @login_required
 def get_sales_stats():
-    # Obtener ventas de los últimos 7 días
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=6)
-    
-    sales = Sale.query.filter(Sale.date >= start_date).all()
-    
-    daily_stats = {}
-    current = start_date
-    while current <= end_date:
-        daily_stats[current.strftime('%Y-%m-%d')] = 0
-        current += timedelta(days=1)
-        
-    for sale in sales:
-        date_str = sale.date.strftime('%Y-%m-%d')
-        if date_str in daily_stats:
-            daily_stats[date_str] += sale.total_usd
-            
-    return jsonify({
-        'labels': list(daily_stats.keys()),
-        'values': list(daily_stats.values())
-    })
+    """
+    Sales analytics read from the daily rollups, as columnar JSON.
+
+    Query params:
+        from, to: ISO dates (default: the 7 days ending today; `days=N` still
+            sets the range ending at `to`). At most MAX_STATS_DAYS days.
+        granularity: day (default), week or month.
+        group_by: product, category, seller or vehicle_type.
+        limit: groups returned with group_by (default 20, max 100).
+
+    Responses carry an ETag; a request with a matching If-None-Match gets
+    304 Not Modified without a body.
+    """
+    try:
+        end = date.fromisoformat(request.args['to']) if request.args.get('to') else date.today()
+        if request.args.get('from'):
+            start = date.fromisoformat(request.args['from'])
+        else:
+            start = end - timedelta(days=max(1, request.args.get('days', 7, type=int)) - 1)
+    except ValueError:
+        return jsonify({'error': 'Invalid date'}), 400
+    if start > end:
+        return jsonify({'error': '`from` must not be after `to`'}), 400
+    if (end - start).days >= MAX_STATS_DAYS:
+        return jsonify({'error': f'Range too large (max {MAX_STATS_DAYS} days)'}), 400
+
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    try:
+        stats = SalesRollupService.stats(
+            start, end,
+            granularity=request.args.get('granularity', 'day'),
+            group_by=request.args.get('group_by') or None,
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    response = jsonify(stats)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True  # Revalidate every time, but cheaply
+    response.add_etag()
+    return response.make_conditional(request)
@@ -1,17 +1,48 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, Response, stream_with_context
 from flask_login import login_required, current_user
-from app.models import Product, InventoryMovement
+from app.models import Product, InventoryMovement, User
 from app.services.inventory_service import InventoryService
+from app.services.ledger_service import LedgerService, MOVEMENT_TYPES
 from app.utils.decorators import admin_required
 from app import db
+from datetime import datetime
 
 bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
 @bp.route('/')
 @login_required
 def index():
-    movements = InventoryMovement.query.order_by(InventoryMovement.date.desc()).all()
-    return render_template('inventory/index.html', movements=movements, title='Movimientos de Inventario')
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+    try:
+        filters = LedgerService.parse_filters(request.args)
+        movements, next_cursor = LedgerService.page(filters, after=request.args.get('after'), limit=per_page)
+    except ValueError as e:
+        flash(f'Error: {str(e)}')
+        filters, next_cursor = {}, None
+        movements = []
+
+    # Filters without the cursor, for the "next page", "first page" and export links
+    filter_args = {k: v for k, v in request.args.items() if k != 'after' and v}
+    users = User.query.order_by(User.username).all()
+    return render_template('inventory/index.html', movements=movements, title='Movimientos de Inventario',
+                           next_cursor=next_cursor, filter_args=filter_args, users=users,
+                           movement_types=MOVEMENT_TYPES, is_first_page=not request.args.get('after'))
+
+@bp.route('/export.csv')
+@login_required
+def export_csv():
+    try:
+        filters = LedgerService.parse_filters(request.args)
+    except ValueError as e:
+        flash(f'Error: {str(e)}')
+        return redirect(url_for('inventory.index'))
+
+    filename = f"kardex_{datetime.now().strftime('%Y%m%d_%H%M')}.csv"
+    return Response(
+        stream_with_context(LedgerService.iter_csv(filters)),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
 
 @bp.route('/add', methods=['GET', 'POST'])
 @login_required
@@ -1,6 +1,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models import Category
+from app.services.product_service import ProductService
 from app.utils.decorators import admin_required
 from app import db
 
@@ -10,7 +11,8 @@ bp = Blueprint('categories', __name__, url_prefix='/categories')
 @login_required
 def list_categories():
     categories = Category.query.all()
-    return render_template('categories/list.html', categories=categories, title='Categorías')
+    product_counts = ProductService.category_product_counts()
+    return render_template('categories/list.html', categories=categories, product_counts=product_counts, title='Categorías')
 
 @bp.route('/add', methods=['GET', 'POST'])
 @login_required
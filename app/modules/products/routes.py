@@ -1,29 +1,23 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from app.models import Product, Setting, Category
+from app.services.product_service import ProductService
+from app.services.search_service import SearchService
+from app.services.import_service import ProductImportService
+from app.services.pricing_service import PricingService
 from app.utils.decorators import admin_required
 from app import db
 
 bp = Blueprint('products', __name__, url_prefix='/products')
 
-def get_rate():
-    s = Setting.query.get('exchange_rate')
-    return float(s.value) if s else 1.0
-
 @bp.route('/')
 @login_required
 def list_products():
     search_query = request.args.get('search')
     if search_query:
-        products = Product.query.filter(
-            Product.is_active == True,
-            (Product.name.ilike(f'%{search_query}%')) |
-            (Product.part_number.ilike(f'%{search_query}%')) |
-            (Product.compatibility.ilike(f'%{search_query}%')) |
-            (Product.manufacturer.ilike(f'%{search_query}%'))
-        ).all()
+        products = SearchService.search(search_query)
     else:
-        products = Product.query.filter_by(is_active=True).all()
+        products = ProductService.query().filter(Product.is_active == True).all()
     return render_template('products/list.html', products=products, title='Productos', search_query=search_query)
 
 @bp.route('/add', methods=['GET', 'POST'])
@@ -43,14 +37,9 @@ def add_product():
         location = request.form.get('location')
         min_stock = request.form.get('min_stock', 0, type=int)
         
-        # Calculate VES price
-        rate = get_rate()
-        price = price_usd * rate
-        
         new_product = Product(
             name=name, 
             quantity=quantity, 
-            price=price, 
             price_usd=price_usd, 
             category_id=category_id,
             part_number=request.form.get('part_number'),
@@ -93,10 +82,6 @@ def edit_product(id):
         product.location = request.form['location']
         product.min_stock = int(request.form.get('min_stock', 0))
         
-        # Recalculate VES price (if price_usd changed)
-        rate = get_rate()
-        product.price = product.price_usd * rate
-        
         try:
             db.session.commit()
             flash('Producto actualizado exitosamente.')
@@ -108,8 +93,7 @@ def edit_product(id):
         
     categories = Category.query.all()
     # Inject current rate for the template calculation
-    s = Setting.query.get('exchange_rate')
-    current_rate = float(s.value) if s else 1.0
+    current_rate = PricingService.current_rate()
     
     return render_template('products/form.html', title='Editar Producto', product=product, categories=categories, current_rate=current_rate)
 
@@ -123,3 +107,26 @@ def delete_product(id):
     db.session.commit()
     flash('Producto eliminado exitosamente (archivado).')
     return redirect(url_for('products.list_products'))
+
+@bp.route('/import', methods=['POST'])
+@login_required
+@admin_required
+def import_products():
+    file = request.files.get('file')
+    if not file or not file.filename:
+        flash('Seleccione un archivo CSV o Excel.')
+        return redirect(url_for('products.list_products'))
+        
+    try:
+        rows = ProductImportService.iter_file_rows(file.stream, file.filename)
+        summary = ProductImportService.import_rows(rows)
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error al importar productos: {str(e)}')
+        return redirect(url_for('products.list_products'))
+        
+    flash(f"Importación completada: {summary['inserted']} nuevos, {summary['updated']} actualizados, "
+          f"{summary['rejected']} rechazados ({summary['rows_per_second']} filas/s).")
+    for error in summary['errors'][:5]:
+        flash(f"Línea {error['line']}: {error['error']}")
+    return redirect(url_for('products.list_products'))
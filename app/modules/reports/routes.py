@@ -1,13 +1,13 @@
-from flask import Blueprint, render_template
-from flask_login import login_required
-from io import BytesIO
-from flask import make_response
-from app.utils.pdf_utils import generate_inventory_pdf, generate_sales_pdf
-from app.models import Product, Sale, InventoryMovement
+from flask import Blueprint, render_template, flash, jsonify, redirect, url_for, send_file
+from flask_login import login_required, current_user
+from app.models import Product, Sale, InventoryMovement, ReportJob
+from app.services.report_job_service import ReportJobService
+from app.services.report_service import ReportService
 from datetime import datetime, timedelta
 from flask import request
 from app.utils.decorators import admin_required
 from app import db
+import os
 
 bp = Blueprint('reports', __name__, url_prefix='/reports')
 
@@ -15,84 +15,84 @@ bp = Blueprint('reports', __name__, url_prefix='/reports')
 @login_required
 @admin_required
 def index():
-    return render_template('dashboard/reports.html', title='Reportes')
+    # Set when a download was queued; the page polls the job and then downloads it
+    job_id = request.args.get('job', type=int)
+    return render_template('dashboard/reports.html', title='Reportes', job_id=job_id)
 
 @bp.route('/no-rotation')
 @login_required
 @admin_required
 def no_rotation():
     days = request.args.get('days', 60, type=int)
-    cutoff_date = datetime.now() - timedelta(days=days)
-    
-    # Subquery: Products with movements since cutoff_date
-    moved_products_query = db.session.query(InventoryMovement.product_id).filter(
-        InventoryMovement.date >= cutoff_date
-    )
-    
-    # Products NOT in the subquery AND Active
-    no_rotation_products = Product.query.filter(
-        Product.is_active == True,
-        ~Product.id.in_(moved_products_query)
-    ).all()
-    
-    # Enrich with last movement date
-    results = []
-    for p in no_rotation_products:
-        last_movement = InventoryMovement.query.filter_by(product_id=p.id).order_by(InventoryMovement.date.desc()).first()
-        results.append({
-            'product': p,
-            'last_movement_date': last_movement.date if last_movement else None
-        })
-        
+    sort = request.args.get('sort', 'idle')
+    try:
+        results = ReportService.no_rotation(days, sort)
+    except ValueError as e:
+        flash(f'Error: {str(e)}')
+        sort = 'idle'
+        results = ReportService.no_rotation(days, sort)
+
     return render_template('reports/no_rotation.html', 
                          products=results, 
                          days=days, 
+                         sort=sort,
+                         total_capital=sum(item['capital'] for item in results),
                          title='Productos Sin Rotación')
 
+def _download_or_wait(report_type):
+    """Sends a cached report, or queues it and lets the reports page poll."""
+    job = ReportJobService.enqueue(report_type, user_id=current_user.id)
+    if job.status == 'done':
+        return redirect(url_for('reports.download_job', job_id=job.id))
+    return redirect(url_for('reports.index', job=job.id))
+
 @bp.route('/download/inventory')
 @login_required
 @admin_required
 def download_inventory_report():
-    products = Product.query.all()
-    pdf = generate_inventory_pdf(products)
-    
-    pdf_output = pdf.output()
-    out = BytesIO(pdf_output)
-
-    response = make_response(out.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'attachment; filename=inventario.pdf'
-    return response
+    return _download_or_wait('inventory')
 
 @bp.route('/download/sales')
 @login_required
 @admin_required
 def download_sales_report():
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=7)
-    
-    sales = Sale.query.filter(Sale.date >= start_date).order_by(Sale.date).all()
-    
-    sales_by_day = {}
-    current = start_date
-    while current <= end_date:
-        sales_by_day[current.strftime('%Y-%m-%d')] = 0
-        current += timedelta(days=1)
-        
-    for sale in sales:
-        day_str = sale.date.strftime('%Y-%m-%d')
-        if day_str in sales_by_day:
-            sales_by_day[day_str] += sale.total_usd
-            
-    sales_data = {
-        'labels': list(sales_by_day.keys()),
-        'values': list(sales_by_day.values())
-    }
-    
-    pdf = generate_sales_pdf(sales_data)
-    out = BytesIO(pdf.output())
-    
-    response = make_response(out.getvalue())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = 'attachment; filename=ventas.pdf'
-    return response
+    return _download_or_wait('sales')
+
+@bp.route('/jobs', methods=['POST'])
+@login_required
+@admin_required
+def create_job():
+    data = request.get_json(silent=True) or request.form
+    try:
+        job = ReportJobService.enqueue(data.get('type'), data.get('params'), user_id=current_user.id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(_job_payload(job)), 202
+
+@bp.route('/jobs/<int:job_id>')
+@login_required
+@admin_required
+def job_status(job_id):
+    job = db.session.get(ReportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_job_payload(job))
+
+@bp.route('/jobs/<int:job_id>/download')
+@login_required
+@admin_required
+def download_job(job_id):
+    job = db.session.get(ReportJob, job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    path = ReportJobService.file_path(job)
+    if job.status != 'done' or not os.path.exists(path):
+        return jsonify({'error': 'Report not ready'}), 409
+    return send_file(path, mimetype='application/pdf', as_attachment=True,
+                     download_name=ReportJobService.filename(job))
+
+def _job_payload(job):
+    payload = ReportJobService.status(job)
+    payload['status_url'] = url_for('reports.job_status', job_id=job.id)
+    payload['download_url'] = url_for('reports.download_job', job_id=job.id)
+    return payload
@@ -1,38 +1,40 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from flask_login import login_required, current_user
 from app.models import Sale, SaleItem, Product, Setting
+from app.services.pricing_service import PricingService
 from app import db
 from datetime import datetime
 
 bp = Blueprint('sales', __name__, url_prefix='/sales')
 
-def get_rate():
-    s = Setting.query.get('exchange_rate')
-    return float(s.value) if s else 1.0
-
-from app.services.inventory_service import InventoryService
+from app.services.sales_service import SalesService
 
 @bp.route('/')
 @login_required
 def index():
-    sales = Sale.query.order_by(Sale.date.desc()).all()
-    
+    per_page = max(1, min(request.args.get('per_page', 50, type=int), 200))
+    try:
+        sales, next_cursor = SalesService.history_page(after=request.args.get('after'), limit=per_page)
+    except ValueError as e:
+        flash(f'Error: {str(e)}')
+        sales, next_cursor = SalesService.history_page(limit=per_page)
+
     # Calcular resumen
-    now = datetime.now()
-    today_total = sum(s.total_usd for s in sales if s.date.date() == now.date())
-    month_total = sum(s.total_usd for s in sales if s.date.month == now.month and s.date.year == now.year)
-    month_count = sum(1 for s in sales if s.date.month == now.month and s.date.year == now.year)
+    totals = SalesService.period_totals()
     
     return render_template('sales/index.html', sales=sales, 
-                         today_total=today_total, 
-                         month_total=month_total, 
-                         month_count=month_count)
+                         today_total=totals['today_total'], 
+                         month_total=totals['month_total'], 
+                         month_count=totals['month_count'],
+                         next_cursor=next_cursor,
+                         per_page=per_page,
+                         is_first_page=not request.args.get('after'))
 
 @bp.route('/new')
 @login_required
 def new_sale():
     products = Product.query.filter(Product.quantity > 0, Product.is_active == True).all()
-    rate = get_rate()
+    rate = PricingService.current_rate()
     return render_template('sales/create.html', products=products, rate=rate)
 
 @bp.route('/create', methods=['POST'])
@@ -44,53 +46,11 @@ def create_sale():
     if not items_data:
         return jsonify({'error': 'No hay items en la venta'}), 400
 
-    total_bs = 0
-    total_usd = 0
-    rate = get_rate()
-    
-    new_sale = Sale(total_bs=0, total_usd=0, user_id=current_user.id)
-    db.session.add(new_sale)
-    db.session.flush() # Para obtener ID
-    
-    for item in items_data:
-        product_id = item['product_id']
-        quantity = int(item['quantity'])
-        
-        product = Product.query.get(product_id)
-        if not product:
-            continue
-            
-        # Use InventoryService to remove stock
-        try:
-            InventoryService.remove_stock(
-                product_id=product.id,
-                quantity=quantity,
-                description=f"Venta #{new_sale.id}",
-                user_id=current_user.id
-            )
-        except ValueError as e:
-            db.session.rollback()
-            return jsonify({'error': str(e)}), 400
-        
-        # Calcular precios
-        price_usd = product.price_usd if product.price_usd else 0
-        price_bs = price_usd * rate
-        
-        sale_item = SaleItem(
-            sale_id=new_sale.id,
-            product_id=product.id,
-            product_name=product.name,
-            quantity=quantity,
-            price_at_moment_bs=price_bs,
-            price_at_moment_usd=price_usd
-        )
-        db.session.add(sale_item)
-        
-        total_bs += price_bs * quantity
-        total_usd += price_usd * quantity
-
-    new_sale.total_bs = total_bs
-    new_sale.total_usd = total_usd
+    try:
+        new_sale = SalesService.create_sale(items_data, current_user.id, PricingService.current_rate())
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
     
     try:
         db.session.commit()
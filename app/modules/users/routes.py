@@ -3,7 +3,6 @@ from flask_login import login_user, logout_user, current_user
 from app import db
 from app.models import User
 from app.utils.security_utils import (
-    is_account_locked, 
     get_lockout_time_remaining, 
     log_login_attempt, 
     clear_successful_attempts,
@@ -26,11 +25,10 @@ def login():
         user_agent = request.headers.get('User-Agent', '')[:256]
         
         # Check if account is locked due to too many failed attempts
-        if is_account_locked(username, ip_address):
-            lockout_info = get_lockout_time_remaining(username, ip_address)
-            if lockout_info:
-                flash(f'Too many failed login attempts. Please try again in {lockout_info["minutes"]} minutes and {lockout_info["seconds"]} seconds.', 'error')
-                return render_template('auth/login.html', username=username)
+        lockout_info = get_lockout_time_remaining(username, ip_address)
+        if lockout_info:
+            flash(f'Too many failed login attempts. Please try again in {lockout_info["minutes"]} minutes and {lockout_info["seconds"]} seconds.', 'error')
+            return render_template('auth/login.html', username=username)
         
         # Query user
         user = User.query.filter_by(username=username).first()
@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+from sqlalchemy import select, case, literal
+from app import db
+from app.models import Product, ProductActivity, InventoryMovement, Sale, SaleItem
+from app.utils.db_utils import upsert_insert
+
+# Rolling windows kept in ProductActivity.units_out_<days>
+WINDOWS = (30, 60, 90)
+
+# Movement types that count as units leaving through rotation
+OUT_TYPES = ('salida',)
+
+
+class ActivityService:
+    @staticmethod
+    def _upsert_statement():
+        table = ProductActivity.__table__
+        stmt = upsert_insert(table)
+        set_ = {
+            'last_movement_at': stmt.excluded.last_movement_at,
+            'last_sale_at': db.func.coalesce(stmt.excluded.last_sale_at, table.c.last_sale_at),
+        }
+        for days in WINDOWS:
+            column = f'units_out_{days}'
+            set_[column] = table.c[column] + stmt.excluded[column]
+        return stmt.on_conflict_do_update(index_elements=['product_id'], set_=set_)
+
+    @staticmethod
+    def record(movements, sale=False):
+        """
+        Folds new movements into the summary with one executemany upsert.
+        Runs in the caller's transaction.
+
+        Args:
+            movements (list): Dicts with product_id, type, quantity and date.
+            sale (bool): The movements come from a sale; sets last_sale_at.
+        """
+        summary = {}
+        for movement in movements:
+            product_id = int(movement['product_id'])
+            when = movement.get('date') or datetime.now()
+            row = summary.setdefault(product_id, {'product_id': product_id, 'last_movement_at': when, 'units_out': 0})
+            row['last_movement_at'] = max(row['last_movement_at'], when)
+            if movement['type'] in OUT_TYPES:
+                row['units_out'] += movement['quantity']
+
+        rows = []
+        for row in summary.values():
+            units_out = row.pop('units_out')
+            row['last_sale_at'] = row['last_movement_at'] if sale else None
+            row.update({f'units_out_{days}': units_out for days in WINDOWS})
+            rows.append(row)
+
+        if rows:
+            db.session.connection().execute(ActivityService._upsert_statement(), rows)
+
+    @staticmethod
+    def rebuild():
+        """
+        Recomputes the whole summary from the movement and sales history with
+        two grouped queries feeding one INSERT ... SELECT. Caller commits.
+
+        Returns:
+            int: Number of products with activity.
+        """
+        now = datetime.now()
+        table = ProductActivity.__table__
+
+        out_columns = []
+        for days in WINDOWS:
+            out_columns.append(db.func.coalesce(db.func.sum(case(
+                (db.and_(InventoryMovement.type.in_(OUT_TYPES), InventoryMovement.date >= now - timedelta(days=days)),
+                 InventoryMovement.quantity),
+                else_=0
+            )), 0).label(f'units_out_{days}'))
+        moved = select(
+            InventoryMovement.product_id.label('product_id'),
+            db.func.max(InventoryMovement.date).label('last_movement_at'),
+            *out_columns
+        ).group_by(InventoryMovement.product_id).subquery()
+
+        sold = select(
+            SaleItem.product_id.label('product_id'),
+            db.func.max(Sale.date).label('last_sale_at')
+        ).join(Sale, SaleItem.sale_id == Sale.id).group_by(SaleItem.product_id).subquery()
+
+        source = select(
+            moved.c.product_id,
+            moved.c.last_movement_at,
+            sold.c.last_sale_at,
+            *[moved.c[f'units_out_{days}'] for days in WINDOWS],
+            literal(now, db.DateTime)
+        ).outerjoin(sold, sold.c.product_id == moved.c.product_id)
+
+        db.session.execute(table.delete())
+        db.session.execute(table.insert().from_select(
+            ['product_id', 'last_movement_at', 'last_sale_at']
+            + [f'units_out_{days}' for days in WINDOWS] + ['windows_as_of'],
+            source
+        ))
+        return db.session.query(db.func.count()).select_from(table).scalar()
+
+    @staticmethod
+    def stale_filter(days):
+        """
+        Criterion for products with no movement in the last `days` days.
+        Use on a query outer-joined to ProductActivity.
+        """
+        return db.or_(
+            ProductActivity.last_movement_at.is_(None),
+            ProductActivity.last_movement_at < datetime.now() - timedelta(days=days)
+        )
+
+    @staticmethod
+    def stale_count(days=60):
+        """Active products idle for `days` days, read from the indexed summary."""
+        return db.session.query(db.func.count(Product.id)).outerjoin(
+            ProductActivity, ProductActivity.product_id == Product.id
+        ).filter(Product.is_active == True, ActivityService.stale_filter(days)).scalar()
@@ -0,0 +1,222 @@
+import json
+import re
+from sqlalchemy import event, inspect
+from app import db
+from app.models import Product, ProductCompatibility
+from app.services.product_service import ProductService
+
+_YEAR_RANGE = re.compile(r'\b((?:19|20)\d{2})\s*(?:-|–|/|\ba\b|\bal\b|\bto\b)\s*((?:19|20)?\d{2})\b', re.IGNORECASE)
+_YEAR_OPEN = re.compile(r'\b((?:19|20)\d{2})\s*\+')
+_YEAR = re.compile(r'\b((?:19|20)\d{2})\b')
+_ENTRY_SEPARATORS = re.compile(r'[,;\n]+')
+
+
+def _normalize_name(value):
+    value = ' '.join(str(value or '').split()).lower()
+    return value or None
+
+
+def _to_year(value):
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _expand_year(start, end):
+    # "2010-15" -> 2015, "1998-05" -> 2005 (the short year crosses the century)
+    if len(end) == 2:
+        end = int(start[:2] + end)
+        if end < int(start):
+            end += 100
+    return int(start), int(end)
+
+
+class CompatibilityService:
+    @staticmethod
+    def parse_entry(entry):
+        """
+        Parses one fitment like 'Toyota Corolla 2010-2015', 'Ford Fiesta 2012',
+        'Chevrolet Aveo 2008+' or 'Nissan'.
+
+        The first word is the make and the rest is the model. Missing years mean
+        the entry fits every year.
+
+        Returns:
+            dict: make/model/year_from/year_to, or None if there is no make.
+        """
+        year_from = year_to = None
+        text = entry
+
+        match = _YEAR_RANGE.search(text)
+        if match:
+            year_from, year_to = _expand_year(match.group(1), match.group(2))
+            text = text[:match.start()] + text[match.end():]
+        else:
+            match = _YEAR_OPEN.search(text)
+            if match:
+                year_from = int(match.group(1))
+                text = text[:match.start()] + text[match.end():]
+            else:
+                years = [int(y) for y in _YEAR.findall(text)]
+                if years:
+                    year_from, year_to = min(years), max(years)
+                    text = _YEAR.sub(' ', text)
+
+        if year_from and year_to and year_from > year_to:
+            year_from, year_to = year_to, year_from
+
+        words = text.split()
+        if not words:
+            return None
+        return {
+            'make': _normalize_name(words[0]),
+            'model': _normalize_name(' '.join(words[1:])),
+            'year_from': year_from,
+            'year_to': year_to
+        }
+
+    @staticmethod
+    def parse(compatibility):
+        """
+        Parses Product.compatibility (JSON list or comma-separated text).
+
+        JSON items may be strings or objects with make/model/year_from/year_to.
+
+        Returns:
+            list: Unique fitment dicts.
+        """
+        if not compatibility or not compatibility.strip():
+            return []
+
+        try:
+            items = json.loads(compatibility)
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            items = _ENTRY_SEPARATORS.split(compatibility)
+
+        entries = []
+        for item in items:
+            if isinstance(item, dict):
+                make = _normalize_name(item.get('make'))
+                if not make:
+                    continue
+                entry = {
+                    'make': make,
+                    'model': _normalize_name(item.get('model')),
+                    'year_from': _to_year(item.get('year_from')),
+                    'year_to': _to_year(item.get('year_to'))
+                }
+            else:
+                entry = CompatibilityService.parse_entry(str(item))
+            if entry and entry not in entries:
+                entries.append(entry)
+        return entries
+
+    @staticmethod
+    def sync_product(connection, product_id, compatibility):
+        """Replaces the fitment rows of one product. Works inside flush events."""
+        table = ProductCompatibility.__table__
+        connection.execute(table.delete().where(table.c.product_id == product_id))
+        entries = CompatibilityService.parse(compatibility)
+        if entries:
+            connection.execute(table.insert(), [dict(e, product_id=product_id) for e in entries])
+
+    @staticmethod
+    def sync_products(connection, compatibility_by_product):
+        """
+        Bulk version of sync_product for writes that bypass the ORM (imports).
+
+        Args:
+            compatibility_by_product (dict): {product_id: compatibility text}.
+        """
+        if not compatibility_by_product:
+            return
+        table = ProductCompatibility.__table__
+        connection.execute(table.delete().where(table.c.product_id.in_(list(compatibility_by_product))))
+        rows = [dict(e, product_id=product_id)
+                for product_id, compatibility in compatibility_by_product.items()
+                for e in CompatibilityService.parse(compatibility)]
+        if rows:
+            connection.execute(table.insert(), rows)
+
+    @staticmethod
+    def rebuild(batch_size=1000):
+        """
+        Backfills product_compatibility from every product's free-text column.
+        Caller commits.
+
+        Returns:
+            int: Number of fitment rows written.
+        """
+        table = ProductCompatibility.__table__
+        db.session.execute(table.delete())
+
+        total = 0
+        rows = []
+        query = db.session.query(Product.id, Product.compatibility).filter(
+            Product.compatibility.isnot(None)
+        ).execution_options(yield_per=batch_size)
+        for product_id, compatibility in query:
+            rows.extend(dict(e, product_id=product_id) for e in CompatibilityService.parse(compatibility))
+            if len(rows) >= batch_size:
+                db.session.execute(table.insert(), rows)
+                total += len(rows)
+                rows = []
+        if rows:
+            db.session.execute(table.insert(), rows)
+            total += len(rows)
+        return total
+
+    @staticmethod
+    def fits_query(make, model=None, year=None, active_only=True):
+        """
+        Products that fit a vehicle. Entries without model or years act as wildcards.
+
+        Args:
+            make (str): e.g. 'Toyota'.
+            model (str, optional): e.g. 'Corolla'.
+            year (int, optional): e.g. 2012.
+            active_only (bool): Exclude archived products.
+
+        Returns:
+            Query: Product query ordered by name, served by ix_product_compatibility_vehicle.
+        """
+        matches = db.session.query(ProductCompatibility.product_id).filter(
+            ProductCompatibility.make == _normalize_name(make)
+        )
+        model = _normalize_name(model)
+        if model:
+            matches = matches.filter(db.or_(
+                ProductCompatibility.model == model,
+                ProductCompatibility.model.is_(None)
+            ))
+        if year:
+            matches = matches.filter(
+                db.or_(ProductCompatibility.year_from.is_(None), ProductCompatibility.year_from <= year),
+                db.or_(ProductCompatibility.year_to.is_(None), ProductCompatibility.year_to >= year)
+            )
+
+        query = ProductService.query().filter(Product.id.in_(matches))
+        if active_only:
+            query = query.filter(Product.is_active == True)
+        return query.order_by(Product.name, Product.id)
+
+
+@event.listens_for(Product, 'after_insert')
+def _compatibility_after_insert(mapper, connection, target):
+    if target.compatibility:
+        CompatibilityService.sync_product(connection, target.id, target.compatibility)
+
+
+@event.listens_for(Product, 'after_update')
+def _compatibility_after_update(mapper, connection, target):
+    if inspect(target).attrs.compatibility.history.has_changes():
+        CompatibilityService.sync_product(connection, target.id, target.compatibility)
+
+
+@event.listens_for(Product, 'after_delete')
+def _compatibility_after_delete(mapper, connection, target):
+    table = ProductCompatibility.__table__
+    connection.execute(table.delete().where(table.c.product_id == target.id))
@@ -0,0 +1,160 @@
+import threading
+import time
+from datetime import datetime
+from flask import current_app, has_app_context
+from sqlalchemy import event, case
+from sqlalchemy.orm import Session
+from app import db
+from app.models import Product
+from app.services.activity_service import ActivityService
+
+# Lower bounds (USD) of the price histogram buckets
+PRICE_BUCKETS = (0, 5, 10, 25, 50, 100, 250, 500)
+
+LOW_STOCK_LIMIT = 50
+NO_ROTATION_DAYS = 60
+
+
+class DashboardCache:
+    """
+    Holds the last computed dashboard metrics for one app.
+
+    Only one thread recomputes at a time: while it does, other requests get
+    the previous (stale) metrics, or wait if there are none yet, so a burst
+    of logins costs one set of queries instead of one per user.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self.metrics = None
+        self.expires_at = 0.0
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()  # Counters and generation; hits are counted without holding _lock
+        self._generation = 0  # Bumped by every invalidation
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _count(self, counter):
+        with self._stats_lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, loader):
+        if self.metrics is not None and time.monotonic() < self.expires_at:
+            self._count('hits')
+            return self.metrics
+
+        if self.metrics is not None and not self._lock.acquire(blocking=False):
+            self._count('hits')
+            return self.metrics  # Someone else is already recomputing
+        if self.metrics is None:
+            self._lock.acquire()
+        try:
+            if self.metrics is None or time.monotonic() >= self.expires_at:
+                self._count('misses')
+                generation = self._generation
+                self.metrics = loader()
+                with self._stats_lock:
+                    # Invalidated while loading: keep serving these, but recompute next time
+                    if self._generation == generation:
+                        self.expires_at = time.monotonic() + self.ttl
+            else:
+                self._count('hits')  # Filled by the thread we waited for
+            return self.metrics
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        with self._stats_lock:
+            self._generation += 1
+            self.expires_at = 0.0
+            self.invalidations += 1
+
+
+class DashboardService:
+    @staticmethod
+    def init_app(app):
+        app.extensions['dashboard_cache'] = DashboardCache(ttl=app.config.get('DASHBOARD_CACHE_TTL', 60))
+
+    @staticmethod
+    def cache():
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('dashboard_cache')
+
+    @staticmethod
+    def mark_dirty(session=None):
+        """Flags the session so the metrics are invalidated when it commits."""
+        (session or db.session).info['dashboard_dirty'] = True
+
+    @staticmethod
+    def compute():
+        """
+        Runs the dashboard aggregates: catalog totals, low stock, no rotation,
+        sales totals and the price histogram.
+
+        Returns:
+            dict: Plain values only, safe to share between requests.
+        """
+        now = datetime.now()
+        active = Product.is_active == True
+        is_low = Product.is_low_stock == True
+
+        total_products, total_value, low_stock_count = db.session.query(
+            db.func.count(Product.id),
+            db.func.coalesce(db.func.sum(Product.quantity * db.func.coalesce(Product.price_usd, 0)), 0),
+            db.func.coalesce(db.func.sum(case((is_low, 1), else_=0)), 0)
+        ).filter(active).one()
+
+        low_stock_products = [{
+            'id': p.id, 'name': p.name, 'vehicle_type': p.vehicle_type, 'brand': p.brand,
+            'quantity': p.quantity, 'min_stock': p.min_stock
+        } for p in db.session.query(
+            Product.id, Product.name, Product.vehicle_type, Product.brand, Product.quantity, Product.min_stock
+        ).filter(active, is_low).order_by(
+            (Product.quantity - Product.min_stock), Product.name
+        ).limit(LOW_STOCK_LIMIT)]
+
+        from app.services.sales_service import SalesService  # Imports InventoryService, which imports this module
+        sales = SalesService.period_totals(now)
+
+        bucket = case(
+            *[(Product.price_usd >= low, low) for low in reversed(PRICE_BUCKETS[1:])],
+            else_=0
+        )
+        histogram = dict(db.session.query(bucket, db.func.count(Product.id)).filter(active).group_by(bucket).all())
+        labels = [f'${low}-{high}' for low, high in zip(PRICE_BUCKETS, PRICE_BUCKETS[1:])] + [f'${PRICE_BUCKETS[-1]}+']
+
+        return {
+            'total_products': total_products,
+            'total_value_usd': round(float(total_value), 2),
+            'low_stock_count': int(low_stock_count),
+            'low_stock_products': low_stock_products,
+            'no_rotation_count': ActivityService.stale_count(NO_ROTATION_DAYS),
+            'today_sales_usd': round(float(sales['today_total']), 2),
+            'month_sales_usd': round(float(sales['month_total']), 2),
+            'month_sales_count': sales['month_count'],
+            'price_histogram': {'labels': labels, 'values': [histogram.get(low, 0) for low in PRICE_BUCKETS]},
+            'computed_at': now.isoformat(timespec='seconds')
+        }
+
+    @staticmethod
+    def metrics():
+        """Cached metrics; recomputed after DASHBOARD_CACHE_TTL seconds or a stock/sales commit."""
+        cache = DashboardService.cache()
+        if cache is None:
+            return DashboardService.compute()
+        return cache.get(DashboardService.compute)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_dashboard(session):
+    if session.info.pop('dashboard_dirty', False):
+        cache = DashboardService.cache()
+        if cache is not None:
+            cache.invalidate()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_dashboard_flag(session):
+    session.info.pop('dashboard_dirty', None)
@@ -0,0 +1,274 @@
+import csv
+import io
+import math
+import re
+import time
+from datetime import datetime
+from sqlalchemy import select
+from app import db
+from app.models import Product, Category
+from app.services.compatibility_service import CompatibilityService
+from app.services.low_stock_service import LowStockService
+from app.utils.db_utils import upsert_insert
+
+# Accepted header names (lowercase) -> Product column
+COLUMN_ALIASES = {
+    'part_number': 'part_number', 'codigo': 'part_number', 'código': 'part_number', 'sku': 'part_number',
+    'name': 'name', 'nombre': 'name', 'descripcion': 'name', 'descripción': 'name',
+    'quantity': 'quantity', 'cantidad': 'quantity', 'stock': 'quantity',
+    'price_usd': 'price_usd', 'precio_usd': 'price_usd', 'precio': 'price_usd', 'price': 'price_usd',
+    'manufacturer': 'manufacturer', 'fabricante': 'manufacturer',
+    'brand': 'brand', 'marca': 'brand',
+    'vehicle_type': 'vehicle_type', 'tipo_vehiculo': 'vehicle_type',
+    'compatibility': 'compatibility', 'compatibilidad': 'compatibility',
+    'location': 'location', 'ubicacion': 'location', 'ubicación': 'location',
+    'min_stock': 'min_stock', 'stock_minimo': 'min_stock',
+    'category': 'category', 'categoria': 'category', 'categoría': 'category',
+}
+
+# Columns an import may overwrite on existing products. Stock is only set for
+# new products; existing stock changes go through InventoryService.
+UPDATABLE_COLUMNS = ('name', 'price_usd', 'manufacturer', 'brand', 'vehicle_type',
+                     'compatibility', 'location', 'min_stock', 'category_id')
+
+MAX_REPORTED_ERRORS = 100
+
+
+_THOUSANDS = re.compile(r'^-?\d{1,3}$')
+
+
+def _to_float(value):
+    """
+    Parses a number from a supplier list, in either '1.234,56' or
+    '1,234.56' notation. The last '.' or ',' is the decimal separator and
+    the other one may only group thousands.
+
+    Raises:
+        ValueError: If the value isn't a number, or if it is ambiguous: a
+            single separator followed by exactly three digits ('1,234').
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).strip().replace(' ', '')
+    separators = [c for c in text if c in ',.']
+    grouping = None
+    whole, fraction = text, ''
+    if len(set(separators)) == 2:
+        decimal = separators[-1]
+        grouping = '.' if decimal == ',' else ','
+        whole, fraction = text.rsplit(decimal, 1)
+        if decimal in whole:
+            raise ValueError("Cantidad o precio inválido.")
+    elif len(separators) > 1:
+        grouping = separators[0]  # '1.234.567': only thousands
+    elif separators:
+        whole, fraction = text.split(separators[0])
+        if len(fraction) == 3 and whole.lstrip('-') not in ('', '0'):
+            raise ValueError(f"Número ambiguo: {value} (use separador decimal y de miles explícitos).")
+
+    if grouping:
+        groups = whole.split(grouping)
+        if not _THOUSANDS.match(groups[0]) or any(len(g) != 3 or not g.isdigit() for g in groups[1:]):
+            raise ValueError("Cantidad o precio inválido.")
+        whole = ''.join(groups)
+    try:
+        number = float(f'{whole}.{fraction}' if fraction else whole)
+    except ValueError:
+        raise ValueError("Cantidad o precio inválido.")
+    if not math.isfinite(number):
+        raise ValueError("Cantidad o precio inválido.")
+    return number
+
+
+def _to_int(value):
+    number = _to_float(value)
+    if not number.is_integer():
+        raise ValueError("Cantidad o precio inválido.")
+    return int(number)
+
+
+def iter_csv_rows(stream):
+    """Yields one dict per CSV line from a binary stream. Detects ',' or ';'."""
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    header_line = text.readline()
+    delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+    header = next(csv.reader([header_line], delimiter=delimiter))
+    for values in csv.reader(text, delimiter=delimiter):
+        if any(v.strip() for v in values):
+            yield dict(zip(header, values))
+
+
+def iter_xlsx_rows(stream):
+    """Yields one dict per row of the first sheet. Requires openpyxl."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ValueError("Para importar archivos Excel instale openpyxl (pip install openpyxl).")
+
+    workbook = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h or '') for h in next(rows, [])]
+        for values in rows:
+            if any(v not in (None, '') for v in values):
+                yield {h: ('' if v is None else v) for h, v in zip(header, values)}
+    finally:
+        workbook.close()
+
+
+class ProductImportService:
+    @staticmethod
+    def iter_file_rows(stream, filename):
+        if filename.lower().endswith(('.xlsx', '.xlsm')):
+            return iter_xlsx_rows(stream)
+        if filename.lower().endswith(('.csv', '.txt')):
+            return iter_csv_rows(stream)
+        raise ValueError("Formato no soportado. Use CSV o Excel (.xlsx).")
+
+    @staticmethod
+    def normalize_row(raw, categories):
+        """
+        Maps a raw file row to Product columns.
+
+        Raises:
+            ValueError: If the row can't be imported.
+        """
+        row = {}
+        for header, value in raw.items():
+            column = COLUMN_ALIASES.get(str(header).strip().lower())
+            if column and str(value).strip() != '':
+                row[column] = value if isinstance(value, (int, float)) else str(value).strip()
+
+        if not row.get('part_number'):
+            raise ValueError("Falta el código (part_number).")
+        if not row.get('name'):
+            raise ValueError("Falta el nombre.")
+
+        row['part_number'] = str(row['part_number'])[:50]
+        row['name'] = str(row['name'])[:100]
+        # Blank cells stay absent: an update keeps the stored value, an insert
+        # gets the column default (_write_chunk). _to_float/_to_int raise
+        # ValueError with the message for the row.
+        for column, parse in (('price_usd', _to_float), ('quantity', _to_int), ('min_stock', _to_int)):
+            if column in row:
+                row[column] = parse(row[column])
+        if row.get('price_usd', 0) < 0 or row.get('quantity', 0) < 0:
+            raise ValueError("Cantidad o precio negativo.")
+
+        category = row.pop('category', None)
+        if category:
+            if category.lower() not in categories:
+                raise ValueError(f"Categoría desconocida: {category}")
+            row['category_id'] = categories[category.lower()]
+        return row
+
+    @staticmethod
+    def _upsert_statement(columns):
+        # Executed as executemany: compiled once per column set and cached,
+        # unlike a multi-row VALUES that is recompiled for every chunk
+        table = Product.__table__
+        stmt = upsert_insert(table)
+        # Rows carry None for cells they didn't supply; those keep the stored value
+        set_ = {c: db.func.coalesce(stmt.excluded[c], table.c[c]) for c in columns if c in UPDATABLE_COLUMNS}
+        if 'min_stock' in set_:
+            # Existing stock is kept, but a new minimum can change the low-stock flag
+            set_.update(LowStockService.sql_values(table.c.quantity, min_stock=set_['min_stock']))
+        set_['updated_at'] = stmt.excluded.updated_at  # onupdate does not apply to ON CONFLICT
+        return stmt.on_conflict_do_update(index_elements=['part_number'], set_=set_)
+
+    @staticmethod
+    def _write_chunk(chunk):
+        """Upserts {part_number: row}. Returns (inserted, updated)."""
+        table = Product.__table__
+        part_numbers = list(chunk)
+        connection = db.session.connection()
+        existing = set(connection.execute(
+            select(table.c.part_number).where(table.c.part_number.in_(part_numbers))
+        ).scalars())
+
+        # executemany needs the same keys in every row
+        columns = sorted(set().union(*chunk.values(), ('price_usd', 'quantity')))
+        now = datetime.now()
+        rows = []
+        for part_number, values in chunk.items():
+            row = {c: values.get(c) for c in columns}
+            # Stock is insert-only, and SQLite checks NOT NULL before ON CONFLICT
+            row['quantity'] = row['quantity'] or 0
+            if part_number not in existing:
+                # Defaults for blank cells of new products; updates keep None
+                row['price_usd'] = row['price_usd'] or 0.0
+                if 'min_stock' in row:
+                    row['min_stock'] = row['min_stock'] or 0
+            row['is_active'] = True
+            # Values for newly inserted products; updates use the ON CONFLICT clause
+            row['is_low_stock'] = row['quantity'] <= (row.get('min_stock') or 0)
+            row['low_stock_since'] = now if row['is_low_stock'] else None
+            rows.append(row)
+        connection.execute(ProductImportService._upsert_statement(columns), rows)
+
+        # Bulk SQL skips the ORM events that maintain the compatibility index
+        if 'compatibility' in columns:
+            ids = dict(connection.execute(
+                select(table.c.part_number, table.c.id).where(table.c.part_number.in_(part_numbers))
+            ).all())
+            CompatibilityService.sync_products(connection, {
+                ids[pn]: row['compatibility'] for pn, row in chunk.items() if pn in ids and 'compatibility' in row
+            })
+
+        inserted = len(set(part_numbers) - existing)
+        return inserted, len(part_numbers) - inserted
+
+    @staticmethod
+    def import_rows(rows, chunk_size=1000, progress=None):
+        """
+        Upserts products keyed by part_number, `chunk_size` rows per statement.
+
+        Only one chunk is held in memory at a time. Each chunk is committed,
+        so a failure part-way keeps the chunks already imported.
+
+        Args:
+            rows (iterable): Raw dicts, e.g. from iter_file_rows.
+            chunk_size (int): Rows per INSERT ... ON CONFLICT.
+            progress (callable, optional): Called with the running summary after each chunk.
+
+        Returns:
+            dict: rows, inserted, updated, rejected, errors, seconds, rows_per_second.
+        """
+        categories = {c.name.lower(): c.id for c in Category.query.all()}
+
+        summary = {'rows': 0, 'inserted': 0, 'updated': 0, 'rejected': 0, 'errors': []}
+        start = time.perf_counter()
+        chunk = {}
+
+        def flush():
+            inserted, updated = ProductImportService._write_chunk(chunk)
+            db.session.commit()
+            summary['inserted'] += inserted
+            summary['updated'] += updated
+            chunk.clear()
+            if progress:
+                progress(summary)
+
+        for line, raw in enumerate(rows, start=2):  # Line 1 is the header
+            summary['rows'] += 1
+            try:
+                row = ProductImportService.normalize_row(raw, categories)
+            except ValueError as e:
+                summary['rejected'] += 1
+                if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                    summary['errors'].append({'line': line, 'error': str(e)})
+                continue
+
+            if row['part_number'] in chunk:
+                summary['updated'] += 1  # Repeated code in the file: later cells win
+                row = {**chunk[row['part_number']], **row}
+            chunk[row['part_number']] = row
+            if len(chunk) >= chunk_size:
+                flush()
+
+        if chunk:
+            flush()
+
+        summary['seconds'] = round(time.perf_counter() - start, 3)
+        summary['rows_per_second'] = round(summary['rows'] / summary['seconds'], 1) if summary['seconds'] else 0.0
+        return summary
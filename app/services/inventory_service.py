@@ -1,5 +1,9 @@
 from app import db
 from app.models import Product, InventoryMovement
+from app.services.activity_service import ActivityService
+from app.services.dashboard_service import DashboardService
+from app.services.low_stock_service import LowStockService
+from sqlalchemy import insert, update, bindparam
 from datetime import datetime
 
 class InventoryService:
@@ -87,24 +91,43 @@ class InventoryService:
         return InventoryService.register_movement_action(product_id, type, quantity, description, user_id, action='remove')
 
     @staticmethod
-    def set_stock(product_id, new_quantity, description, user_id=None):
-        product = Product.query.get(product_id)
-        if not product:
-            raise ValueError("Producto no encontrado.")
-        
-        current_qty = product.quantity
-        diff = new_quantity - current_qty
+    def set_stock(product_id, new_quantity, description, user_id=None, max_retries=3):
+        """
+        Sets the absolute stock of a product and logs the difference as 'ajuste'.
         
-        if diff == 0:
-            return None # No change
+        Uses compare-and-set (UPDATE ... WHERE quantity = <value read>) so a sale
+        committed between the read and the write is never overwritten; the read
+        is retried instead.
+        """
+        product_id = int(product_id)
+        if new_quantity < 0:
+            raise ValueError("El stock no puede ser negativo.")
             
-        if diff > 0:
-            return InventoryService.add_stock(product_id, diff, description, user_id, type='ajuste')
-        else:
-            return InventoryService.remove_stock(product_id, abs(diff), description, user_id, type='ajuste')
+        for _ in range(max_retries):
+            current_qty = db.session.query(Product.quantity).filter(Product.id == product_id).scalar()
+            if current_qty is None:
+                raise ValueError("Producto no encontrado.")
+                
+            diff = new_quantity - current_qty
+            if diff == 0:
+                return None # No change
+                
+            InventoryService.validate_movement(abs(diff), description, user_id)
+            
+            result = db.session.execute(
+                update(Product)
+                .where(Product.id == product_id, Product.quantity == current_qty)
+                .values(quantity=new_quantity, **LowStockService.sql_values(new_quantity))
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount == 1:
+                InventoryService._expire_quantity([product_id])
+                return InventoryService._record_movement(product_id, 'ajuste', abs(diff), description, user_id)
+                
+        raise ValueError("El stock cambió durante el ajuste. Intente de nuevo.")
 
     @staticmethod
-    def register_movement_action(product_id, movement_type, quantity, description, user_id, action):
+    def validate_movement(quantity, description, user_id):
         if quantity <= 0:
             raise ValueError("La cantidad debe ser mayor a 0.")
             
@@ -113,18 +136,35 @@ class InventoryService:
             
         if not description or len(description.strip()) < 5:
             raise ValueError("Debe proporcionar una descripción detallada (mínimo 5 caracteres).")
-            
-        product = Product.query.get(product_id)
-        if not product:
-            raise ValueError("Producto no encontrado.")
-            
-        if action == 'remove':
-            if product.quantity < quantity:
-                raise ValueError(f"Stock insuficiente. Disponible: {product.quantity}, Solicitado: {quantity}")
-            product.quantity -= quantity
-        elif action == 'add':
-            product.quantity += quantity
-            
+
+    @staticmethod
+    def _whole_quantity(value):
+        """
+        Stock units from a batch line: an int, an integral float (2.0) or a
+        digit string. Raises ValueError for 2.5 instead of truncating it.
+        """
+        if isinstance(value, bool):
+            raise ValueError("Cantidad inválida.")
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"La cantidad debe ser un número entero: {value}")
+            return int(value)
+        if isinstance(value, str):
+            value = value.strip()
+            if not value.lstrip('-').isdigit():
+                raise ValueError(f"La cantidad debe ser un número entero: {value}")
+        return int(value)
+
+    @staticmethod
+    def _expire_quantity(product_ids):
+        # Stock is changed with SQL UPDATEs, so drop any stale value cached in the session
+        for product_id in product_ids:
+            product = db.session.identity_map.get(db.session.identity_key(Product, product_id))
+            if product is not None:
+                db.session.expire(product, ['quantity', 'is_low_stock', 'low_stock_since'])
+
+    @staticmethod
+    def _record_movement(product_id, movement_type, quantity, description, user_id):
         movement = InventoryMovement(
             product_id=product_id,
             type=movement_type,
@@ -133,6 +173,291 @@ class InventoryService:
             user_id=user_id,
             date=datetime.now()
         )
-        
         db.session.add(movement)
+        ActivityService.record([{
+            'product_id': product_id, 'type': movement_type, 'quantity': quantity, 'date': movement.date
+        }])
+        DashboardService.mark_dirty()
         return movement
+
+    @staticmethod
+    def register_movement_action(product_id, movement_type, quantity, description, user_id, action):
+        InventoryService.validate_movement(quantity, description, user_id)
+        product_id = int(product_id)
+        
+        # Atomic conditional UPDATE: the stock check and the decrement happen in
+        # the same statement, so two concurrent sales can't both take the last unit.
+        stmt = update(Product).where(Product.id == product_id)
+        if action == 'remove':
+            new_quantity = Product.quantity - quantity
+            stmt = stmt.where(Product.quantity >= quantity).values(
+                quantity=new_quantity, **LowStockService.sql_values(new_quantity)
+            )
+        elif action == 'add':
+            new_quantity = Product.quantity + quantity
+            stmt = stmt.values(quantity=new_quantity, **LowStockService.sql_values(new_quantity))
+        else:
+            stmt = None
+            
+        if stmt is not None:
+            result = db.session.execute(stmt.execution_options(synchronize_session=False))
+            InventoryService._expire_quantity([product_id])
+            if result.rowcount != 1:
+                available = db.session.query(Product.quantity).filter(Product.id == product_id).scalar()
+                if available is None:
+                    raise ValueError("Producto no encontrado.")
+                raise ValueError(f"Stock insuficiente. Disponible: {available}, Solicitado: {quantity}")
+        elif db.session.get(Product, product_id) is None:
+            raise ValueError("Producto no encontrado.")
+            
+        return InventoryService._record_movement(product_id, movement_type, quantity, description, user_id)
+
+    @staticmethod
+    def remove_stock_bulk(quantities, description, user_id, products=None, type='salida', sale=False):
+        """
+        Removes stock from several products at once: one SELECT for all of them,
+        validation of every line before anything changes, one conditional
+        UPDATE (executemany) for the stock and one bulk INSERT for the movements.
+        
+        Args:
+            quantities (dict): {product_id: quantity to remove}.
+            description (str): Reason, shared by every movement.
+            user_id (int): ID of the user performing the action.
+            products (dict, optional): {product_id: Product} already loaded by the caller.
+            type (str): Movement type to record.
+            sale (bool): The stock leaves through a sale (updates last_sale_at).
+            
+        Returns:
+            int: Number of movements recorded.
+            
+        Raises:
+            ValueError: If any product is missing or lacks stock. The caller must
+                roll back, since another sale may have won a race mid-update.
+        """
+        for quantity in quantities.values():
+            InventoryService.validate_movement(quantity, description, user_id)
+            
+        if products is None:
+            products = {p.id: p for p in Product.query.filter(Product.id.in_(list(quantities))).all()}
+            
+        for product_id, quantity in quantities.items():
+            product = products.get(product_id)
+            if not product:
+                raise ValueError("Producto no encontrado.")
+            if product.quantity < quantity:
+                raise ValueError(f"Stock insuficiente para {product.name}. Disponible: {product.quantity}, Solicitado: {quantity}")
+                
+        if not quantities:
+            return 0
+            
+        # The check above reads a snapshot; the WHERE guard is what actually
+        # prevents overselling when another sale commits in between.
+        applied = InventoryService._apply_deltas({pid: (-qty, qty) for pid, qty in quantities.items()})
+        if not applied:
+            raise ValueError("Stock insuficiente: otro usuario vendió alguno de los productos. Intente de nuevo.")
+            
+        now = datetime.now()
+        InventoryService._insert_movements([{
+            'product_id': product_id,
+            'type': type,
+            'quantity': quantity,
+            'description': description,
+            'user_id': user_id,
+            'date': now
+        } for product_id, quantity in quantities.items()], sale=sale)
+        return len(quantities)
+
+    @staticmethod
+    def _execute_many(stmt, params):
+        """Runs an UPDATE for every params dict and returns the total rowcount."""
+        if not params:
+            return 0
+        db.session.flush()
+        connection = db.session.connection()
+        if connection.dialect.supports_sane_multi_rowcount:
+            return connection.execute(stmt, params).rowcount
+        return sum(connection.execute(stmt, p).rowcount for p in params)
+
+    @staticmethod
+    def _apply_deltas(deltas):
+        """
+        Applies {product_id: (delta, required)} as quantity = quantity + delta,
+        only where the current quantity is at least `required`.
+        
+        Returns:
+            bool: False if any product no longer met its guard. Caller rolls back.
+        """
+        table = Product.__table__
+        stmt = table.update().where(
+            table.c.id == bindparam('b_id'),
+            table.c.quantity >= bindparam('b_required')
+        )
+        new_quantity = table.c.quantity + bindparam('b_delta')
+        stmt = stmt.values(quantity=new_quantity, **LowStockService.sql_values(new_quantity))
+        params = [{'b_id': pid, 'b_delta': delta, 'b_required': required}
+                  for pid, (delta, required) in deltas.items()]
+        
+        updated = InventoryService._execute_many(stmt, params)
+        InventoryService._expire_quantity(deltas)
+        return updated == len(params)
+
+    @staticmethod
+    def _compare_and_set(expected):
+        """
+        Applies {product_id: (old_quantity, new_quantity)} only where the stock
+        is still `old_quantity`.
+        
+        Returns:
+            bool: False if any product changed since it was read. Caller rolls back.
+        """
+        table = Product.__table__
+        stmt = table.update().where(
+            table.c.id == bindparam('b_id'),
+            table.c.quantity == bindparam('b_old')
+        ).values(quantity=bindparam('b_new'), **LowStockService.sql_values(bindparam('b_new')))
+        params = [{'b_id': pid, 'b_old': old, 'b_new': new}
+                  for pid, (old, new) in expected.items()]
+        
+        updated = InventoryService._execute_many(stmt, params)
+        InventoryService._expire_quantity(expected)
+        return updated == len(params)
+
+    @staticmethod
+    def _insert_movements(rows, sale=False):
+        if rows:
+            db.session.execute(insert(InventoryMovement), rows)
+            ActivityService.record(rows, sale=sale)
+            DashboardService.mark_dirty()
+
+    @staticmethod
+    def apply_movements(batch, user_id, description=None, atomic=True):
+        """
+        Applies many stock movements (supplier receipts, counts, write-offs) with
+        one SELECT for every product involved, in-memory validation, two
+        executemany UPDATEs and one bulk INSERT for the movements.
+        
+        Args:
+            batch (list): Lines like {'product_id': 1, 'action': 'add'|'remove'|'set',
+                'quantity': 5, 'description': '...', 'type': '...'}. 'set' means
+                the counted stock; 'description' and 'type' are optional.
+                Lines for the same product are applied in order.
+            user_id (int): ID of the user performing the action.
+            description (str, optional): Default description for lines without one.
+            atomic (bool): If True, any invalid line rejects the whole batch.
+                If False, invalid lines are skipped and reported.
+                
+        Returns:
+            dict: {'applied', 'rejected', 'movements', 'errors': [{'line', 'product_id', 'error'}]}
+            
+        Raises:
+            ValueError: In atomic mode if any line is invalid (nothing is written),
+                or in either mode if stock changed concurrently (caller rolls back).
+        """
+        default_types = {'add': 'entrada', 'remove': 'salida', 'set': 'ajuste'}
+        
+        product_ids = set()
+        for line in batch:
+            try:
+                product_ids.add(int(line['product_id']))
+            except (KeyError, TypeError, ValueError):
+                pass
+        stock = dict(db.session.query(Product.id, Product.quantity).filter(
+            Product.id.in_(product_ids)
+        ).all()) if product_ids else {}
+        
+        original = dict(stock)
+        has_set = set()
+        required = {}  # Minimum stock each product must still have at write time
+        movements = []
+        errors = []
+        now = datetime.now()
+        
+        for index, line in enumerate(batch, start=1):
+            try:
+                product_id = int(line['product_id'])
+                quantity = InventoryService._whole_quantity(line['quantity'])
+                action = line.get('action', 'add')
+                if action not in default_types:
+                    raise ValueError(f"Acción inválida: {action}")
+                line_description = line.get('description') or description
+                
+                if product_id not in stock:
+                    raise ValueError("Producto no encontrado.")
+                    
+                current = stock[product_id]
+                if action == 'set':
+                    if quantity < 0:
+                        raise ValueError("El stock no puede ser negativo.")
+                    moved = abs(quantity - current)
+                    new_quantity = quantity
+                    if moved == 0:
+                        continue # Count matches, nothing to record
+                else:
+                    moved = quantity
+                    new_quantity = current + quantity if action == 'add' else current - quantity
+                    
+                InventoryService.validate_movement(moved, line_description, user_id)
+                if new_quantity < 0:
+                    raise ValueError(f"Stock insuficiente. Disponible: {current}, Solicitado: {quantity}")
+                    
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append({
+                    'line': index,
+                    'product_id': line.get('product_id') if isinstance(line, dict) else None,
+                    'error': str(e) if isinstance(e, ValueError) else "Línea inválida."
+                })
+                continue
+                
+            stock[product_id] = new_quantity
+            if action == 'set':
+                has_set.add(product_id)
+            # Lowest the running delta dipped below the original stock
+            required[product_id] = max(required.get(product_id, 0), original[product_id] - new_quantity)
+            movements.append({
+                'product_id': product_id,
+                'type': line.get('type') or default_types[action],
+                'quantity': moved,
+                'description': line_description,
+                'user_id': user_id,
+                'date': now
+            })
+            
+        if errors and atomic:
+            raise ValueError(f"{len(errors)} línea(s) inválida(s). Primera: línea {errors[0]['line']}: {errors[0]['error']}")
+            
+        changed = {pid for pid in required if stock[pid] != original[pid]}
+        # Counted products need the exact stock that was read; pure receipts and
+        # write-offs only need enough stock, so concurrent sales don't abort them.
+        ok = InventoryService._compare_and_set({
+            pid: (original[pid], stock[pid]) for pid in changed & has_set
+        }) and InventoryService._apply_deltas({
+            pid: (stock[pid] - original[pid], required[pid]) for pid in changed - has_set
+        })
+        if not ok:
+            raise ValueError("El stock cambió durante la operación. Intente de nuevo.")
+            
+        InventoryService._insert_movements(movements)
+        return {
+            'applied': len(batch) - len(errors),
+            'rejected': len(errors),
+            'movements': len(movements),
+            'errors': errors
+        }
+
+    @staticmethod
+    def set_stock_bulk(mapping, description, user_id, atomic=True):
+        """
+        Sets the counted stock for many products at once (physical inventory).
+        
+        Args:
+            mapping (dict): {product_id: counted quantity}.
+            
+        Returns:
+            dict: Same summary as `apply_movements`.
+        """
+        return InventoryService.apply_movements(
+            [{'product_id': pid, 'action': 'set', 'quantity': qty} for pid, qty in mapping.items()],
+            user_id,
+            description=description,
+            atomic=atomic
+        )
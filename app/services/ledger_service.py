@@ -0,0 +1,162 @@
+import csv
+import io
+from datetime import datetime, timedelta
+from sqlalchemy import tuple_
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import InventoryMovement, Product, User
+from app.utils.db_utils import date_key
+
+MOVEMENT_TYPES = ('entrada', 'salida', 'ajuste')
+
+CSV_HEADER = ('Fecha', 'Código', 'Producto', 'Tipo', 'Cantidad', 'Responsable', 'Descripción')
+
+
+class LedgerService:
+    @staticmethod
+    def parse_filters(args):
+        """
+        Reads ledger filters from request args.
+
+        Args:
+            args (dict): product_id, part_number, user_id, type, date_from, date_to
+                (dates as YYYY-MM-DD, both inclusive).
+
+        Returns:
+            dict: Normalized filters, only the ones that were given.
+
+        Raises:
+            ValueError: If a value is malformed or the product doesn't exist.
+        """
+        filters = {}
+        try:
+            if args.get('product_id'):
+                filters['product_id'] = int(args['product_id'])
+            if args.get('user_id'):
+                filters['user_id'] = int(args['user_id'])
+            for key in ('date_from', 'date_to'):
+                if args.get(key):
+                    filters[key] = datetime.strptime(args[key], '%Y-%m-%d').date()
+        except ValueError:
+            raise ValueError("Filtro inválido.")
+
+        if args.get('part_number') and 'product_id' not in filters:
+            product_id = db.session.query(Product.id).filter(
+                Product.part_number == args['part_number'].strip()
+            ).scalar()
+            if product_id is None:
+                raise ValueError("Producto no encontrado.")
+            filters['product_id'] = product_id
+
+        if args.get('type'):
+            if args['type'] not in MOVEMENT_TYPES:
+                raise ValueError("Tipo de movimiento inválido.")
+            filters['type'] = args['type']
+        return filters
+
+    @staticmethod
+    def _filter(query, filters):
+        if 'product_id' in filters:
+            query = query.filter(InventoryMovement.product_id == filters['product_id'])
+        if 'user_id' in filters:
+            query = query.filter(InventoryMovement.user_id == filters['user_id'])
+        if 'type' in filters:
+            query = query.filter(InventoryMovement.type == filters['type'])
+        if 'date_from' in filters:
+            query = query.filter(date_key(InventoryMovement.date) >= filters['date_from'].isoformat())
+        if 'date_to' in filters:
+            day_after = filters['date_to'] + timedelta(days=1)
+            query = query.filter(date_key(InventoryMovement.date) < day_after.isoformat())
+        return query
+
+    @staticmethod
+    def encode_cursor(stored_date, movement_id):
+        return f'{stored_date}|{movement_id}'
+
+    @staticmethod
+    def decode_cursor(cursor):
+        """
+        Raises:
+            ValueError: If the cursor wasn't produced by encode_cursor.
+        """
+        stored_date, _, movement_id = (cursor or '').rpartition('|')
+        if not stored_date:
+            raise ValueError("Cursor inválido.")
+        return stored_date, int(movement_id)
+
+    @staticmethod
+    def page(filters, after=None, limit=50):
+        """
+        One page of the ledger, newest first, keyset-paginated on (date, id).
+
+        Product and user are loaded in the same SELECT, and only the columns
+        the ledger shows.
+
+        Args:
+            filters (dict): From parse_filters.
+            after (str, optional): next_cursor of the previous page.
+            limit (int): Page size.
+
+        Returns:
+            tuple: (movements, next_cursor or None)
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        stored_date = date_key(InventoryMovement.date)
+        query = db.session.query(InventoryMovement, stored_date).options(
+            joinedload(InventoryMovement.product).load_only(Product.name, Product.part_number),
+            joinedload(InventoryMovement.user).load_only(User.username)
+        )
+        query = LedgerService._filter(query, filters)
+        if after:
+            query = query.filter(
+                tuple_(stored_date, InventoryMovement.id) < tuple_(*LedgerService.decode_cursor(after))
+            )
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(
+            InventoryMovement.date.desc(), InventoryMovement.id.desc()
+        ).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_key = rows[-1]
+            next_cursor = LedgerService.encode_cursor(last_key, last.id)
+        return [movement for movement, _ in rows], next_cursor
+
+    @staticmethod
+    def iter_csv(filters, chunk_size=1000):
+        """
+        Yields the filtered ledger as CSV text, a chunk of rows at a time.
+
+        Only the exported columns are selected and rows are fetched with
+        yield_per, so memory stays flat however long the ledger is.
+        """
+        query = db.session.query(
+            InventoryMovement.date, Product.part_number, Product.name, InventoryMovement.type,
+            InventoryMovement.quantity, User.username, InventoryMovement.description
+        ).join(Product, InventoryMovement.product_id == Product.id).outerjoin(
+            User, InventoryMovement.user_id == User.id
+        )
+        query = LedgerService._filter(query, filters).order_by(
+            InventoryMovement.date.desc(), InventoryMovement.id.desc()
+        )
+
+        buffer = io.StringIO()
+        buffer.write('\ufeff')  # BOM so Excel opens it as UTF-8
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        for i, (date, part_number, name, movement_type, quantity, username, description) in enumerate(
+            query.execution_options(yield_per=chunk_size), start=1
+        ):
+            writer.writerow((
+                date.strftime('%Y-%m-%d %H:%M:%S') if date else '', part_number or '', name,
+                movement_type, quantity, username or 'Sistema', description or ''
+            ))
+            if i % chunk_size == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
@@ -0,0 +1,95 @@
+from datetime import datetime
+from sqlalchemy import event, case, tuple_
+from app import db
+from app.models import Product
+
+
+class LowStockService:
+    @staticmethod
+    def sql_values(new_quantity, min_stock=None, now=None):
+        """
+        SET clauses that keep is_low_stock/low_stock_since in step with a stock
+        UPDATE. Pass the *new* quantity expression: SQL evaluates every SET
+        against the old row.
+
+        Args:
+            new_quantity: SQL expression or value for the updated quantity.
+            min_stock: Expression for the updated min_stock (default: unchanged).
+            now (datetime, optional): Timestamp for products that just turned low.
+        """
+        table = Product.__table__
+        if min_stock is None:
+            min_stock = table.c.min_stock
+        low = new_quantity <= db.func.coalesce(min_stock, 0)
+        return {
+            'is_low_stock': low,
+            'low_stock_since': case(
+                (low, db.func.coalesce(table.c.low_stock_since, now or datetime.now())),
+                else_=None
+            )
+        }
+
+    @staticmethod
+    def refresh(product):
+        """Recomputes the flag of a Product being written through the ORM."""
+        low = (product.quantity or 0) <= (product.min_stock or 0)
+        if low and product.low_stock_since is None:
+            product.low_stock_since = datetime.now()
+        elif not low:
+            product.low_stock_since = None
+        product.is_low_stock = low
+
+    @staticmethod
+    def query():
+        """Active products at or below their minimum, served by the partial index."""
+        return Product.query.filter(Product.is_active == True, Product.is_low_stock == True)
+
+    @staticmethod
+    def encode_cursor(product):
+        return f'{product.low_stock_since.isoformat()}|{product.id}'
+
+    @staticmethod
+    def feed(since=None, after=None, limit=100):
+        """
+        Low-stock products ordered by when they became low, oldest first.
+
+        Args:
+            since (datetime, optional): Only products that became low at or after it.
+            after (str, optional): next_cursor of the previous page.
+            limit (int): Page size.
+
+        Returns:
+            tuple: (products, next_cursor or None)
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        query = LowStockService.query()
+        if since is not None:
+            query = query.filter(Product.low_stock_since >= since)
+        if after:
+            try:
+                stamp, _, product_id = after.rpartition('|')
+                key = (datetime.fromisoformat(stamp), int(product_id))
+            except ValueError:
+                raise ValueError("Invalid cursor")
+            query = query.filter(tuple_(Product.low_stock_since, Product.id) > key)
+
+        products = query.order_by(Product.low_stock_since, Product.id).limit(limit + 1).all()
+        next_cursor = None
+        if len(products) > limit:
+            products = products[:limit]
+            next_cursor = LowStockService.encode_cursor(products[-1])
+        return products, next_cursor
+
+
+@event.listens_for(Product, 'before_insert')
+def _low_stock_on_insert(mapper, connection, target):
+    LowStockService.refresh(target)
+
+
+@event.listens_for(Product, 'before_update')
+def _low_stock_on_update(mapper, connection, target):
+    state = db.inspect(target)
+    if state.attrs.quantity.history.has_changes() or state.attrs.min_stock.history.has_changes():
+        LowStockService.refresh(target)
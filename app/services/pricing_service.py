@@ -0,0 +1,99 @@
+from datetime import datetime
+from sqlalchemy import select, cast, bindparam
+from app import db
+from app.models import Product, ExchangeRate, Setting
+from app.services.settings_cache import SettingsCache
+
+class PricingService:
+    """
+    Bs prices are not stored: they are price_usd times the exchange rate in
+    effect, so a rate change is a single INSERT into exchange_rate.
+    """
+
+    @staticmethod
+    def rate_at(when=None):
+        """
+        Returns:
+            float: Rate in effect at `when` (default now). Falls back to the
+            legacy 'exchange_rate' setting, then 1.0, if there is no history.
+        """
+        when = when or datetime.now()
+        rate = db.session.query(ExchangeRate.rate).filter(
+            ExchangeRate.effective_at <= when
+        ).order_by(ExchangeRate.effective_at.desc(), ExchangeRate.id.desc()).limit(1).scalar()
+        if rate is None:
+            setting = Setting.query.get('exchange_rate')
+            rate = float(setting.value) if setting else 1.0
+        return rate
+
+    @staticmethod
+    def _load_current_rate():
+        """(rate, seconds until the next scheduled rate takes effect, or None)"""
+        now = datetime.now()
+        next_change = db.session.query(db.func.min(ExchangeRate.effective_at)).filter(
+            ExchangeRate.effective_at > now
+        ).scalar()
+        ttl = (next_change - now).total_seconds() if next_change else None
+        return PricingService.rate_at(now), ttl
+
+    @staticmethod
+    def current_rate():
+        """Active rate, served from the app's SettingsCache when available."""
+        cache = SettingsCache.current()
+        if cache is None:
+            return PricingService.rate_at()
+        return cache.get('exchange_rate', PricingService._load_current_rate)
+
+    @staticmethod
+    def rate_expression(when=None):
+        """
+        SQL scalar for the rate in effect at `when`. When omitted, "now" is
+        bound at execution time so cached statements stay correct.
+        """
+        if when is None:
+            when_param = bindparam('rate_now', callable_=datetime.now, type_=db.DateTime, unique=True)
+        else:
+            when_param = bindparam('rate_at', value=when, type_=db.DateTime, unique=True)
+
+        history = select(ExchangeRate.rate).where(
+            ExchangeRate.effective_at <= when_param
+        ).order_by(ExchangeRate.effective_at.desc(), ExchangeRate.id.desc()).limit(1).scalar_subquery()
+        legacy = select(cast(Setting.value, db.Float)).where(
+            Setting.key == 'exchange_rate'
+        ).scalar_subquery()
+        return db.func.coalesce(history, legacy, 1.0)
+
+    @staticmethod
+    def price_expression(when=None):
+        """SQL expression for the Bs price of a product at `when` (default now)."""
+        return db.func.coalesce(Product.price_usd, 0) * PricingService.rate_expression(when)
+
+    @staticmethod
+    def set_rate(rate, user_id=None, effective_at=None):
+        """
+        Records a new rate. O(1): no product row is touched. Caller commits
+        and then calls SettingsCache.invalidate('exchange_rate').
+
+        The legacy 'exchange_rate' setting is kept in sync for code that still
+        reads it, and the settings version is bumped for other processes.
+        """
+        if rate <= 0:
+            raise ValueError("La tasa debe ser mayor a 0.")
+
+        entry = ExchangeRate(rate=rate, effective_at=effective_at or datetime.now(), user_id=user_id)
+        db.session.add(entry)
+
+        if entry.effective_at <= datetime.now():
+            setting = Setting.query.get('exchange_rate')
+            if not setting:
+                db.session.add(Setting(key='exchange_rate', value=str(rate)))
+            else:
+                setting.value = str(rate)
+        SettingsCache.bump_version()
+        return entry
+
+    @staticmethod
+    def history(limit=100):
+        return ExchangeRate.query.order_by(
+            ExchangeRate.effective_at.desc(), ExchangeRate.id.desc()
+        ).limit(limit).all()
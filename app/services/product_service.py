@@ -0,0 +1,100 @@
+from app import db
+from app.models import Product, Category
+from sqlalchemy.orm import joinedload
+
+class ProductService:
+    # Public field name -> column. Mirrors the keys of Product.to_dict().
+    FIELDS = {
+        'id': Product.id,
+        'name': Product.name,
+        'quantity': Product.quantity,
+        'price': Product.price,
+        'price_usd': Product.price_usd,
+        'category_id': Product.category_id,
+        'category_name': Category.name,
+        'part_number': Product.part_number,
+        'manufacturer': Product.manufacturer,
+        'brand': Product.brand,
+        'vehicle_type': Product.vehicle_type,
+        'compatibility': Product.compatibility,
+        'location': Product.location,
+        'min_stock': Product.min_stock,
+    }
+
+    @staticmethod
+    def query():
+        """
+        Base Product query with the category joined in the same SELECT.
+
+        Use it for any listing that ends up calling Product.to_dict() or reading
+        product.category, otherwise each row lazy-loads its category (N+1).
+        """
+        return Product.query.options(joinedload(Product.category))
+
+    @staticmethod
+    def category_product_counts():
+        """
+        Returns:
+            dict: {category_id: number of products}, computed in one GROUP BY.
+        """
+        rows = db.session.query(Product.category_id, db.func.count(Product.id)).filter(
+            Product.category_id.isnot(None)
+        ).group_by(Product.category_id).all()
+        return dict(rows)
+
+    @staticmethod
+    def parse_fields(raw):
+        """
+        Parses a comma-separated `fields=` projection.
+
+        Args:
+            raw (str, optional): e.g. 'id,name,price_usd'. Empty means all fields.
+
+        Returns:
+            list: Field names in request order.
+
+        Raises:
+            ValueError: If an unknown field is requested.
+        """
+        if not raw:
+            return list(ProductService.FIELDS)
+
+        fields = []
+        for name in raw.split(','):
+            name = name.strip()
+            if not name or name in fields:
+                continue
+            if name not in ProductService.FIELDS:
+                raise ValueError(f"Unknown field: {name}")
+            fields.append(name)
+        return fields or list(ProductService.FIELDS)
+
+    @staticmethod
+    def iter_rows(fields, after_id=0, limit=None, chunk_size=1000):
+        """
+        Yields products as dicts, ordered by id, selecting only the requested columns.
+
+        Rows are fetched in chunks of `chunk_size` instead of materializing every
+        Product, so memory stays flat no matter how large the catalog is.
+
+        Args:
+            fields (list): Field names from `parse_fields`.
+            after_id (int): Keyset cursor; only products with a greater id are returned.
+            limit (int, optional): Maximum number of rows.
+            chunk_size (int): Rows buffered per database fetch.
+
+        Yields:
+            tuple: (product_id, dict) so callers can build the next cursor even
+            when 'id' was not requested.
+        """
+        columns = [Product.id] + [ProductService.FIELDS[f] for f in fields]
+        query = db.session.query(*columns)
+        if 'category_name' in fields:
+            query = query.outerjoin(Category, Product.category_id == Category.id)
+
+        query = query.filter(Product.id > after_id).order_by(Product.id)
+        if limit:
+            query = query.limit(limit)
+
+        for row in query.execution_options(yield_per=chunk_size):
+            yield row[0], dict(zip(fields, row[1:]))
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import ReportJob, Product, Category, InventoryMovement, Sale
+from app.services.pricing_service import PricingService
+from app.services.report_service import ReportService
+from app.services.sales_rollup_service import SalesRollupService
+from app.services.valuation_service import ValuationService
+from app.utils.pdf_utils import generate_inventory_pdf, generate_sales_pdf, render_sections, section_process_pool
+from app.utils.timing_utils import StageTimer
+
+
+class ReportJobRunner:
+    """
+    Runs report jobs for one app on a small thread pool, so rendering never
+    blocks a web worker. With workers=0 jobs run inline (tests, scripts).
+
+    Progress of running jobs is kept in memory: writing it to SQLite while
+    the report's chunked read is open would contend for the database lock.
+
+    Multi-section reports share one process pool (`pdf_processes` workers),
+    created on first use so apps that never render one never spawn it.
+    """
+
+    def __init__(self, app, workers=2, cache_dir=None, pdf_processes=1):
+        self.app = app
+        self.cache_dir = cache_dir
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job') if workers else None
+        self.pdf_processes = pdf_processes
+        self.progress = {}
+        self._lock = threading.Lock()
+        self._pdf_pool = None
+
+    def submit(self, job_id):
+        if self.executor is None:
+            self.run(job_id)
+        else:
+            self.executor.submit(self.run, job_id)
+
+    def run(self, job_id):
+        with self.app.app_context():
+            try:
+                ReportJobService.run(job_id)
+            finally:
+                with self._lock:
+                    self.progress.pop(job_id, None)
+
+    def set_progress(self, job_id, fraction):
+        with self._lock:
+            self.progress[job_id] = max(0, min(int(fraction * 100), 99))
+
+    def pdf_pool(self):
+        """The section-rendering pool, or None to render serially (one process)."""
+        if self.pdf_processes <= 1:
+            return None
+        with self._lock:
+            if self._pdf_pool is None:
+                self._pdf_pool = section_process_pool(self.pdf_processes)
+            return self._pdf_pool
+
+
+def _inventory_params(params):
+    return {}
+
+
+def _build_inventory(params, progress, timer):
+    with timer.stage('valuation'):
+        valuation = ValuationService.summary()
+    total = valuation['totals']['products'] or 1
+    step = max(total // 100, 1)
+
+    def rows():
+        for i, row in enumerate(ReportService.inventory_rows()):
+            if i % step == 0:
+                progress(i / total)
+            yield row
+
+    pdf = generate_inventory_pdf(rows(), valuation, timer)
+    with timer.stage('output'):
+        return pdf.output()
+
+
+def _sales_params(params):
+    end = params.get('end')
+    return {'end': date.fromisoformat(end).isoformat() if end else date.today().isoformat()}
+
+
+def _build_sales(params, progress, timer):
+    end = date.fromisoformat(params['end'])
+    with timer.stage('fetch'):
+        sales_data = SalesRollupService.daily_totals(end - timedelta(days=7), end)
+    with timer.stage('render'):
+        pdf = generate_sales_pdf(sales_data)
+    with timer.stage('output'):
+        return pdf.output()
+
+
+def _month_end_params(params):
+    month = params.get('month') or date.today().strftime('%Y-%m')
+    return {'month': datetime.strptime(month, '%Y-%m').strftime('%Y-%m')}
+
+
+def _build_month_end(params, progress, timer):
+    year, month = (int(part) for part in params['month'].split('-'))
+    with timer.stage('fetch'):
+        sections = ReportService.month_end_sections(year, month)
+    progress(0.2)
+    return render_sections(
+        sections, f"Cierre de mes {params['month']}", pool=ReportJobService.runner().pdf_pool(),
+        min_parallel_rows=current_app.config.get('REPORT_PDF_PARALLEL_MIN_ROWS', 20000), timer=timer
+    )
+
+
+# report_type -> params normalizer, builder (returns the PDF bytes) and download name
+REPORTS = {
+    'inventory': {'params': _inventory_params, 'build': _build_inventory, 'filename': 'inventario.pdf'},
+    'sales': {'params': _sales_params, 'build': _build_sales, 'filename': 'ventas.pdf'},
+    'month_end': {'params': _month_end_params, 'build': _build_month_end, 'filename': 'cierre_de_mes.pdf'},
+}
+
+
+class ReportJobService:
+    @staticmethod
+    def init_app(app):
+        cache_dir = app.config.get('REPORT_CACHE_DIR') or os.path.join(app.instance_path, 'report_cache')
+        app.extensions['report_jobs'] = ReportJobRunner(
+            app, workers=app.config.get('REPORT_JOB_WORKERS', 2), cache_dir=cache_dir,
+            pdf_processes=app.config.get('REPORT_PDF_PROCESSES') or os.cpu_count() or 1
+        )
+
+    @staticmethod
+    def runner():
+        return current_app.extensions['report_jobs']
+
+    @staticmethod
+    def data_version():
+        """
+        Fingerprint of the data reports read, derived when a job is enqueued
+        so no write path has to maintain it. Stock changes always add a
+        movement and sales are insert-only, so their newest ids cover them;
+        product edits move updated_at, deletions the count. Categories are few
+        enough to include whole, and the rate is the one in effect now.
+        """
+        newest = db.session.query(
+            db.session.query(db.func.max(InventoryMovement.id)).scalar_subquery(),
+            db.session.query(db.func.max(Sale.id)).scalar_subquery(),
+            db.session.query(db.func.count(Product.id)).scalar_subquery(),
+            db.session.query(db.func.max(Product.updated_at)).scalar_subquery()
+        ).one()
+        categories = db.session.query(Category.id, Category.name).order_by(Category.id).all()
+        return json.dumps([
+            [str(value) for value in newest], [list(row) for row in categories], PricingService.current_rate()
+        ])
+
+    @staticmethod
+    def cache_key(report_type, params, version):
+        raw = json.dumps([report_type, params, version], sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def file_path(job):
+        return os.path.join(ReportJobService.runner().cache_dir, f'{job.cache_key}.pdf')
+
+    @staticmethod
+    def filename(job):
+        return REPORTS[job.report_type]['filename']
+
+    @staticmethod
+    def enqueue(report_type, params=None, user_id=None):
+        """
+        Returns a job for the report, reusing a finished one (served from the
+        disk cache) or one in progress when type, parameters and data version
+        match; otherwise queues a new job. Commits, since the worker reads the
+        job from its own session.
+
+        Raises:
+            ValueError: If the report type or its parameters are invalid.
+        """
+        report = REPORTS.get(report_type)
+        if report is None:
+            raise ValueError("Tipo de reporte inválido.")
+        try:
+            params = report['params'](params or {})
+        except (TypeError, ValueError):
+            raise ValueError("Parámetros de reporte inválidos.")
+
+        key = ReportJobService.cache_key(report_type, params, ReportJobService.data_version())
+        timeout = current_app.config.get('REPORT_JOB_TIMEOUT', 600)
+        job = ReportJob.query.filter(
+            ReportJob.cache_key == key, ReportJob.status != 'failed'
+        ).order_by(ReportJob.id.desc()).first()
+        if job is not None:
+            if job.status == 'done' and os.path.exists(ReportJobService.file_path(job)):
+                return job
+            if job.status in ('queued', 'running') and job.created_at > datetime.now() - timedelta(seconds=timeout):
+                return job
+
+        job = ReportJob(
+            report_type=report_type, params=json.dumps(params, sort_keys=True), cache_key=key,
+            user_id=user_id, created_at=datetime.now()
+        )
+        db.session.add(job)
+        db.session.commit()
+        runner = ReportJobService.runner()
+        runner.submit(job.id)
+        if runner.executor is None:
+            db.session.refresh(job)  # Ran inline in another session
+        return job
+
+    @staticmethod
+    def run(job_id):
+        """Renders a queued job and stores the PDF under its cache key."""
+        job = db.session.get(ReportJob, job_id)
+        if job is None or job.status != 'queued':
+            return
+        job.status = 'running'
+        job.started_at = datetime.now()
+        db.session.commit()
+
+        runner = ReportJobService.runner()
+        timer = StageTimer()
+        try:
+            data = REPORTS[job.report_type]['build'](
+                json.loads(job.params), lambda fraction: runner.set_progress(job_id, fraction), timer
+            )
+            os.makedirs(runner.cache_dir, exist_ok=True)
+            path = ReportJobService.file_path(job)
+            with timer.stage('store'):
+                tmp_path = f'{path}.{job_id}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_path, path)  # Readers never see a partial file
+
+            job.status = 'done'
+            job.progress = 100
+            job.finished_at = datetime.now()
+            db.session.commit()
+            current_app.logger.info('Report job %s (%s): %d bytes, stages (ms): %s',
+                                    job_id, job.report_type, len(data), timer.as_dict())
+            ReportJobService.prune()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.exception('Report job %s failed', job_id)
+            job = db.session.get(ReportJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)[:200]
+            job.finished_at = datetime.now()
+            db.session.commit()
+
+    @staticmethod
+    def status(job):
+        """job.to_dict() with the live progress of a job running in this process."""
+        data = job.to_dict()
+        if job.status == 'running':
+            data['progress'] = ReportJobService.runner().progress.get(job.id, job.progress)
+        return data
+
+    @staticmethod
+    def prune():
+        """Deletes cached files older than REPORT_CACHE_MAX_AGE seconds."""
+        max_age = current_app.config.get('REPORT_CACHE_MAX_AGE', 86400)
+        cache_dir = ReportJobService.runner().cache_dir
+        cutoff = time.time() - max_age
+        for name in os.listdir(cache_dir):
+            path = os.path.join(cache_dir, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass  # Removed by another worker
+
@@ -0,0 +1,159 @@
+from datetime import datetime, date
+from sqlalchemy import case
+from app import db
+from app.models import Product, ProductActivity, Category, InventoryMovement, SalesDaily, SalesDailyItem, User
+from app.services.activity_service import ActivityService
+from app.services.valuation_service import ValuationService
+from app.utils.db_utils import date_key
+
+# no_rotation sort keys
+NO_ROTATION_SORTS = ('idle', 'capital')
+
+
+# Rows fetched per round trip when streaming a report
+REPORT_CHUNK_SIZE = 1000
+
+
+class ReportService:
+    @staticmethod
+    def inventory_rows(chunk_size=REPORT_CHUNK_SIZE):
+        """
+        Active products for the inventory report as lightweight rows (id,
+        name, quantity, price_usd), fetched `chunk_size` at a time instead of
+        loading the whole catalog as ORM objects.
+        """
+        return db.session.query(
+            Product.id, Product.name, Product.quantity, Product.price_usd
+        ).filter(Product.is_active == True).order_by(Product.id).yield_per(chunk_size)
+
+    @staticmethod
+    def no_rotation(days=60, sort='idle'):
+        """
+        Active products without movements in the last `days` days.
+
+        Args:
+            days (int): Idle threshold.
+            sort (str): 'idle' (never moved first, then oldest movement) or
+                'capital' (quantity * price_usd, highest first).
+
+        Returns:
+            list: dicts with product, last_movement_date, idle_days (None if it
+            never moved) and capital (USD tied up in stock).
+
+        Raises:
+            ValueError: If `sort` is unknown.
+        """
+        if sort not in NO_ROTATION_SORTS:
+            raise ValueError("Orden inválido.")
+
+        now = datetime.now()
+        last_date = ProductActivity.last_movement_at
+        capital = (Product.quantity * db.func.coalesce(Product.price_usd, 0)).label('capital')
+
+        # Reads the maintained per-product summary instead of aggregating the ledger
+        query = db.session.query(Product, last_date, capital).outerjoin(
+            ProductActivity, ProductActivity.product_id == Product.id
+        ).filter(Product.is_active == True, ActivityService.stale_filter(days))
+        if sort == 'capital':
+            query = query.order_by(capital.desc(), Product.id)
+        else:
+            query = query.order_by(last_date.asc().nulls_first(), Product.id)
+
+        return [{
+            'product': product,
+            'last_movement_date': last_date,
+            'idle_days': (now - last_date).days if last_date else None,
+            'capital': capital_usd or 0.0
+        } for product, last_date, capital_usd in query]
+
+    @staticmethod
+    def month_end_sections(year, month, no_rotation_days=60):
+        """
+        Data for the consolidated month-end report, as plain values so each
+        section can be rendered in another process.
+
+        Sections: inventory valuation by category, sales by seller, products
+        without rotation and the month's movement summary per product.
+
+        Returns:
+            list: dicts with title, header, col_widths, rows (lists of
+            strings) and summary (lines printed after the table).
+        """
+        start = date(year, month, 1)
+        end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+        active = Product.is_active == True
+        money = lambda value: f"{value or 0:.2f}"
+
+        # Inventory valuation by category
+        category = db.func.coalesce(Category.name, 'Sin categoría')
+        value = ValuationService.value_expression()
+        valuation = db.session.query(
+            category, Product.part_number, Product.name, Product.quantity, Product.price_usd, value
+        ).outerjoin(Category, Product.category_id == Category.id).filter(active).order_by(category, Product.name)
+        subtotals = ValuationService.subtotals('category')
+        total_value = ValuationService.totals()['value_usd']
+
+        # Sales by seller, from the daily rollups
+        seller = db.func.coalesce(User.username, 'Sin vendedor')
+        in_month = db.and_(SalesDailyItem.day >= start, SalesDailyItem.day < end)
+        sales = db.session.query(
+            seller, db.func.sum(SalesDailyItem.units),
+            db.func.sum(SalesDailyItem.total_usd), db.func.sum(SalesDailyItem.total_bs)
+        ).outerjoin(User, SalesDailyItem.user_id == User.id).filter(in_month).group_by(seller).order_by(
+            db.func.sum(SalesDailyItem.total_usd).desc()
+        ).all()
+        sale_count, month_usd = db.session.query(
+            db.func.coalesce(db.func.sum(SalesDaily.sale_count), 0),
+            db.func.coalesce(db.func.sum(SalesDaily.total_usd), 0)
+        ).filter(SalesDaily.day >= start, SalesDaily.day < end).one()
+
+        # Products without rotation, most capital first
+        now = datetime.now()
+        capital = Product.quantity * db.func.coalesce(Product.price_usd, 0)
+        idle = db.session.query(
+            Product.part_number, Product.name, Product.quantity, ProductActivity.last_movement_at, capital
+        ).outerjoin(ProductActivity, ProductActivity.product_id == Product.id).filter(
+            active, ActivityService.stale_filter(no_rotation_days)
+        ).order_by(capital.desc(), Product.id).all()
+
+        # Movement summary for the month
+        stored_date = date_key(InventoryMovement.date)
+        by_type = lambda kind: db.func.sum(case((InventoryMovement.type == kind, InventoryMovement.quantity), else_=0))
+        movements = db.session.query(
+            Product.part_number, Product.name,
+            by_type('entrada'), by_type('salida'), by_type('ajuste'), db.func.count(InventoryMovement.id)
+        ).join(Product, InventoryMovement.product_id == Product.id).filter(
+            stored_date >= start.isoformat(), stored_date < end.isoformat()
+        ).group_by(Product.id, Product.part_number, Product.name).order_by(Product.name).all()
+
+        return [{
+            'title': 'Valorización de inventario por categoría',
+            'header': ['Categoría', 'Código', 'Nombre', 'Cant.', 'Precio ($)', 'Total ($)'],
+            'col_widths': [30, 30, 60, 20, 25, 25],
+            'rows': [[cat, part or '', name, str(qty), money(price), money(total)]
+                     for cat, part, name, qty, price, total in valuation],
+            'summary': [f"{sub['name']}: ${sub['value_usd']:.2f}" for sub in subtotals]
+                       + [f"Valor Total del Inventario: ${total_value:.2f}"]
+        }, {
+            'title': 'Ventas por vendedor',
+            'header': ['Vendedor', 'Unidades', 'Total ($)', 'Total (Bs)'],
+            'col_widths': [60, 30, 40, 40],
+            'rows': [[name, str(units), money(usd), money(bs)] for name, units, usd, bs in sales],
+            'summary': [f"Ventas del mes: {sale_count} por ${month_usd:.2f}"]
+        }, {
+            'title': f'Productos sin rotación ({no_rotation_days} días)',
+            'header': ['Código', 'Nombre', 'Cant.', 'Último mov.', 'Días', 'Capital ($)'],
+            'col_widths': [30, 60, 20, 30, 20, 30],
+            'rows': [[part or '', name, str(qty),
+                      last.strftime('%Y-%m-%d') if last else 'Nunca',
+                      str((now - last).days) if last else '-', money(cap)]
+                     for part, name, qty, last, cap in idle],
+            'summary': [f"Capital inmovilizado: ${sum(row[-1] or 0 for row in idle):.2f}"]
+        }, {
+            'title': 'Resumen de movimientos del mes',
+            'header': ['Código', 'Nombre', 'Entradas', 'Salidas', 'Ajustes', 'Movs.'],
+            'col_widths': [30, 70, 22, 22, 22, 24],
+            'rows': [[part or '', name, str(inp), str(out), str(adj), str(count)]
+                     for part, name, inp, out, adj, count in movements],
+            'summary': [f"Productos con movimientos: {len(movements)}"]
+        }]
@@ -0,0 +1,234 @@
+from datetime import timedelta
+from sqlalchemy import select
+from app import db
+from app.models import Sale, SaleItem, SalesDaily, SalesDailyItem, Product, Category, User
+from app.utils.db_utils import upsert_insert
+
+GRANULARITIES = ('day', 'week', 'month')
+GROUP_BY_FIELDS = ('product', 'category', 'seller', 'vehicle_type')
+
+
+class SalesRollupService:
+    """
+    Daily sales rollups, so range stats read one row per day (or per day and
+    product/seller) instead of every sale.
+    """
+
+    @staticmethod
+    def _increment_statement(table, keys, counters):
+        stmt = upsert_insert(table)
+        return stmt.on_conflict_do_update(
+            index_elements=keys,
+            set_={c: table.c[c] + stmt.excluded[c] for c in counters}
+        )
+
+    @staticmethod
+    def record_sale(sale, items):
+        """
+        Adds a new sale to the rollups. Runs in the caller's transaction, so
+        the rollup commits (or rolls back) together with the sale.
+
+        Args:
+            sale (Sale): Flushed sale with date, user_id and totals set.
+            items (list): Dicts with product_id, quantity, price_at_moment_usd
+                and price_at_moment_bs, as inserted into SaleItem.
+        """
+        day = sale.date.date()
+        connection = db.session.connection()
+
+        connection.execute(
+            SalesRollupService._increment_statement(
+                SalesDaily.__table__, ['day'], ('sale_count', 'total_usd', 'total_bs')
+            ),
+            [{'day': day, 'sale_count': 1, 'total_usd': sale.total_usd, 'total_bs': sale.total_bs}]
+        )
+        connection.execute(
+            SalesRollupService._increment_statement(
+                SalesDailyItem.__table__, ['day', 'product_id', 'user_id'], ('units', 'total_usd', 'total_bs')
+            ),
+            [{
+                'day': day,
+                'product_id': item['product_id'],
+                'user_id': sale.user_id or 0,
+                'units': item['quantity'],
+                'total_usd': item['price_at_moment_usd'] * item['quantity'],
+                'total_bs': item['price_at_moment_bs'] * item['quantity']
+            } for item in items]
+        )
+
+    @staticmethod
+    def rebuild():
+        """
+        Recomputes both rollups from Sale/SaleItem with two INSERT ... SELECT
+        statements. Caller commits.
+
+        Returns:
+            int: Number of days with sales.
+        """
+        sale_day = db.func.date(Sale.date)
+
+        db.session.execute(SalesDaily.__table__.delete())
+        db.session.execute(SalesDaily.__table__.insert().from_select(
+            ['day', 'sale_count', 'total_usd', 'total_bs'],
+            select(
+                sale_day, db.func.count(Sale.id),
+                db.func.coalesce(db.func.sum(Sale.total_usd), 0),
+                db.func.coalesce(db.func.sum(Sale.total_bs), 0)
+            ).group_by(sale_day)
+        ))
+
+        seller = db.func.coalesce(Sale.user_id, 0)
+        db.session.execute(SalesDailyItem.__table__.delete())
+        db.session.execute(SalesDailyItem.__table__.insert().from_select(
+            ['day', 'product_id', 'user_id', 'units', 'total_usd', 'total_bs'],
+            select(
+                sale_day, SaleItem.product_id, seller,
+                db.func.sum(SaleItem.quantity),
+                db.func.sum(SaleItem.quantity * SaleItem.price_at_moment_usd),
+                db.func.sum(SaleItem.quantity * SaleItem.price_at_moment_bs)
+            ).join(Sale, SaleItem.sale_id == Sale.id).group_by(sale_day, SaleItem.product_id, seller)
+        ))
+        return db.session.query(db.func.count()).select_from(SalesDaily).scalar()
+
+    @staticmethod
+    def daily_totals(start, end):
+        """
+        USD sales per day from `start` to `end` (dates, inclusive), days
+        without sales included as 0.
+
+        Returns:
+            dict: {'labels': ['YYYY-MM-DD', ...], 'values': [...]}
+        """
+        totals = dict(db.session.query(SalesDaily.day, SalesDaily.total_usd).filter(
+            SalesDaily.day >= start, SalesDaily.day <= end
+        ).all())
+
+        labels, values = [], []
+        day = start
+        while day <= end:
+            labels.append(day.isoformat())
+            values.append(totals.get(day, 0))
+            day += timedelta(days=1)
+        return {'labels': labels, 'values': values}
+
+    @staticmethod
+    def _period_expression(day, granularity):
+        """SQL expression giving the first day ('YYYY-MM-DD') of the period containing `day`."""
+        if db.engine.dialect.name == 'postgresql':
+            if granularity == 'day':
+                return db.func.to_char(day, 'YYYY-MM-DD')
+            return db.func.to_char(db.func.date_trunc(granularity, day), 'YYYY-MM-DD')
+        if granularity == 'week':
+            return db.func.date(day, 'weekday 0', '-6 days')  # Monday
+        if granularity == 'month':
+            return db.func.strftime('%Y-%m-01', day)
+        return db.func.date(day)
+
+    @staticmethod
+    def _periods(start, end, granularity):
+        """First day of every period from `start` to `end`, as used for labels."""
+        if granularity == 'week':
+            current = start - timedelta(days=start.weekday())
+        elif granularity == 'month':
+            current = start.replace(day=1)
+        else:
+            current = start
+
+        periods = []
+        while current <= end:
+            periods.append(current.isoformat())
+            if granularity == 'week':
+                current += timedelta(days=7)
+            elif granularity == 'month':
+                current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                current += timedelta(days=1)
+        return periods
+
+    @staticmethod
+    def stats(start, end, granularity='day', group_by=None, limit=20):
+        """
+        Sales between `start` and `end` (dates, inclusive) bucketed by period,
+        optionally split by a dimension. Computed with GROUP BY on the rollups.
+
+        Args:
+            granularity (str): One of GRANULARITIES.
+            group_by (str, optional): One of GROUP_BY_FIELDS.
+            limit (int): With group_by, keep the `limit` groups that sold most.
+
+        Returns:
+            dict: Columnar data. 'labels' holds the period start dates. Without
+            group_by, 'values' (USD) and 'sale_count' are flat arrays aligned
+            with labels; with it, 'groups' names each row of the 'values' and
+            'units' matrices.
+
+        Raises:
+            ValueError: If granularity or group_by is unknown.
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unknown granularity: {granularity}")
+        if group_by is not None and group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"Unknown group_by: {group_by}")
+
+        labels = SalesRollupService._periods(start, end, granularity)
+        index = {label: i for i, label in enumerate(labels)}
+        result = {
+            'from': start.isoformat(), 'to': end.isoformat(),
+            'granularity': granularity, 'group_by': group_by, 'labels': labels
+        }
+
+        if group_by is None:
+            period = SalesRollupService._period_expression(SalesDaily.day, granularity)
+            rows = db.session.query(
+                period, db.func.sum(SalesDaily.total_usd), db.func.sum(SalesDaily.sale_count)
+            ).filter(SalesDaily.day >= start, SalesDaily.day <= end).group_by(period).all()
+
+            values = [0] * len(labels)
+            sale_count = [0] * len(labels)
+            for label, total, count in rows:
+                if label in index:
+                    values[index[label]] = round(total, 2)
+                    sale_count[index[label]] = count
+            result.update(values=values, sale_count=sale_count)
+            return result
+
+        # Products and sellers are grouped by id (names need not be unique) and named afterwards
+        query = db.session.query().select_from(SalesDailyItem)
+        if group_by == 'product':
+            group = SalesDailyItem.product_id
+        elif group_by == 'seller':
+            group = SalesDailyItem.user_id
+        else:
+            query = query.join(Product, SalesDailyItem.product_id == Product.id)
+            if group_by == 'vehicle_type':
+                group = db.func.coalesce(Product.vehicle_type, 'Sin tipo')
+            else:
+                group = db.func.coalesce(Category.name, 'Sin categoría')
+                query = query.outerjoin(Category, Product.category_id == Category.id)
+        in_range = db.and_(SalesDailyItem.day >= start, SalesDailyItem.day <= end)
+
+        top = [key for key, in query.with_entities(group).filter(in_range).group_by(group).order_by(
+            db.func.sum(SalesDailyItem.total_usd).desc()
+        ).limit(limit)]
+
+        period = SalesRollupService._period_expression(SalesDailyItem.day, granularity)
+        rows = query.with_entities(
+            group, period, db.func.sum(SalesDailyItem.total_usd), db.func.sum(SalesDailyItem.units)
+        ).filter(in_range, group.in_(top)).group_by(group, period).all()
+
+        position = {key: i for i, key in enumerate(top)}
+        values = [[0] * len(labels) for _ in top]
+        units = [[0] * len(labels) for _ in top]
+        for key, label, total, sold in rows:
+            if label in index:
+                values[position[key]][index[label]] = round(total, 2)
+                units[position[key]][index[label]] = sold
+
+        if group_by == 'product':
+            names = dict(db.session.query(Product.id, Product.name).filter(Product.id.in_(top)).all())
+            top = [names.get(key, f'Producto #{key}') for key in top]
+        elif group_by == 'seller':
+            names = dict(db.session.query(User.id, User.username).filter(User.id.in_(top)).all())
+            top = [names.get(key, 'Sin vendedor') for key in top]
+        result.update(groups=top, values=values, units=units)
+        return result
@@ -0,0 +1,143 @@
+from app import db
+from app.models import Product, Sale, SaleItem, User
+from app.services.inventory_service import InventoryService
+from app.services.sales_rollup_service import SalesRollupService
+from app.utils.db_utils import date_key
+from datetime import datetime
+from sqlalchemy import insert, case, tuple_
+from sqlalchemy.orm import joinedload, selectinload
+
+class SalesService:
+    @staticmethod
+    def create_sale(items_data, user_id, rate):
+        """
+        Creates a sale, its items and the stock movements in a fixed number of
+        round trips, regardless of how many lines the cart has.
+
+        Args:
+            items_data (list): [{'product_id': int, 'quantity': int}, ...].
+                Repeated products are merged into one line.
+            user_id (int): Seller creating the sale.
+            rate (float): Exchange rate (Bs per USD) for the Bs prices.
+
+        Returns:
+            Sale: The new sale (not committed).
+
+        Raises:
+            ValueError: If a line is invalid or any product lacks stock.
+                The caller must roll back.
+        """
+        quantities = {}
+        for item in items_data:
+            try:
+                product_id = int(item['product_id'])
+                quantity = int(item['quantity'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError("Item de venta inválido.")
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        products = {p.id: p for p in Product.query.filter(Product.id.in_(list(quantities))).all()}
+        # Unknown products are skipped, as the sales screen always did
+        quantities = {pid: qty for pid, qty in quantities.items() if pid in products}
+        if not quantities:
+            raise ValueError("No hay items en la venta")
+
+        # Local time, like every report cutoff; also the day the rollup is keyed on
+        new_sale = Sale(total_bs=0, total_usd=0, user_id=user_id, date=datetime.now())
+        db.session.add(new_sale)
+        db.session.flush() # Para obtener ID
+
+        # Validates the whole cart before touching any stock
+        InventoryService.remove_stock_bulk(
+            quantities,
+            description=f"Venta #{new_sale.id}",
+            user_id=user_id,
+            products=products,
+            sale=True
+        )
+
+        total_bs = 0
+        total_usd = 0
+        sale_items = []
+        for product_id, quantity in quantities.items():
+            product = products[product_id]
+            price_usd = product.price_usd if product.price_usd else 0
+            price_bs = price_usd * rate
+
+            sale_items.append({
+                'sale_id': new_sale.id,
+                'product_id': product_id,
+                'product_name': product.name,
+                'quantity': quantity,
+                'price_at_moment_bs': price_bs,
+                'price_at_moment_usd': price_usd
+            })
+            total_bs += price_bs * quantity
+            total_usd += price_usd * quantity
+
+        db.session.execute(insert(SaleItem), sale_items)
+
+        new_sale.total_bs = total_bs
+        new_sale.total_usd = total_usd
+        SalesRollupService.record_sale(new_sale, sale_items)
+        return new_sale
+
+    @staticmethod
+    def period_totals(now=None):
+        """
+        Today's and this month's sales in one aggregate over the indexed Sale.date.
+
+        Returns:
+            dict: today_total, month_total (USD) and month_count.
+        """
+        now = now or datetime.now()
+        stored_date = date_key(Sale.date)
+        today = now.strftime('%Y-%m-%d')
+        today_total, month_total, month_count = db.session.query(
+            db.func.coalesce(db.func.sum(case((stored_date >= today, Sale.total_usd), else_=0)), 0),
+            db.func.coalesce(db.func.sum(Sale.total_usd), 0),
+            db.func.count(Sale.id)
+        ).filter(stored_date >= now.strftime('%Y-%m-01')).one()
+        return {'today_total': today_total, 'month_total': month_total, 'month_count': month_count}
+
+    @staticmethod
+    def history_page(after=None, limit=50):
+        """
+        One page of sales, newest first, keyset-paginated on (date, id).
+
+        The seller is joined into the same SELECT and the items of the whole
+        page are loaded with one extra IN query.
+
+        Args:
+            after (str, optional): next_cursor of the previous page.
+            limit (int): Page size.
+
+        Returns:
+            tuple: (sales, next_cursor or None)
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        stored_date = date_key(Sale.date)
+        query = db.session.query(Sale, stored_date).options(
+            joinedload(Sale.user).load_only(User.username),
+            selectinload(Sale.items).load_only(SaleItem.quantity, SaleItem.product_name)
+        )
+        if after:
+            cursor_date, _, sale_id = after.rpartition('|')
+            try:
+                key = (cursor_date, int(sale_id))
+            except ValueError:
+                raise ValueError("Cursor inválido.")
+            if not cursor_date:
+                raise ValueError("Cursor inválido.")
+            query = query.filter(tuple_(stored_date, Sale.id) < key)
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(Sale.date.desc(), Sale.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last, last_date = rows[-1]
+            next_cursor = f'{last_date}|{last.id}'
+        return [sale for sale, _ in rows], next_cursor
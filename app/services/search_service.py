@@ -0,0 +1,168 @@
+import re
+from sqlalchemy import event, text
+from app import db
+from app.models import Product
+from app.services.product_service import ProductService
+
+# Characters ignored when matching part numbers ("AB-123 4" == "AB1234")
+PART_NUMBER_SEPARATORS = ('-', ' ', '.', '/')
+
+def _sql_normalize(column):
+    expr = f"coalesce({column}, '')"
+    for sep in PART_NUMBER_SEPARATORS:
+        expr = f"replace({expr}, '{sep}', '')"
+    return expr
+
+_FTS_COLUMNS = "name, part_number, part_number_norm, compatibility, manufacturer"
+_FTS_VALUES = f"new.id, new.name, new.part_number, {_sql_normalize('new.part_number')}, new.compatibility, new.manufacturer"
+
+# The index is a regular FTS5 table keyed by rowid = product.id and kept in sync
+# by triggers. Stock/price updates don't fire the update trigger.
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        {_FTS_COLUMNS},
+        tokenize = 'unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_fts_ai AFTER INSERT ON product BEGIN
+        INSERT INTO product_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_VALUES});
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_ad AFTER DELETE ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS product_fts_au
+        AFTER UPDATE OF name, part_number, compatibility, manufacturer ON product BEGIN
+        DELETE FROM product_fts WHERE rowid = old.id;
+        INSERT INTO product_fts(rowid, {_FTS_COLUMNS}) VALUES ({_FTS_VALUES});
+    END""",
+]
+
+FTS_REBUILD = [
+    "DELETE FROM product_fts",
+    f"""INSERT INTO product_fts(rowid, {_FTS_COLUMNS})
+        SELECT id, name, part_number, {_sql_normalize('part_number')}, compatibility, manufacturer
+        FROM product""",
+]
+
+# bm25 column weights, same order as _FTS_COLUMNS. Part number hits rank first.
+_RANK = "bm25(product_fts, 5.0, 10.0, 10.0, 1.0, 2.0)"
+
+_fts_ready = {}
+
+@event.listens_for(Product.__table__, 'after_create')
+def _create_fts_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in FTS_DDL:
+            connection.execute(text(statement))
+
+
+class SearchService:
+    @staticmethod
+    def normalize_part_number(value):
+        value = value or ''
+        for sep in PART_NUMBER_SEPARATORS:
+            value = value.replace(sep, '')
+        return value
+
+    @staticmethod
+    def build_match_query(search_query):
+        """
+        Builds an FTS5 MATCH expression: every word as a prefix term, OR the
+        whole input as a normalized part number prefix.
+
+        Returns:
+            str: MATCH expression, or None if the input has no searchable words.
+        """
+        terms = re.findall(r'\w+', search_query or '')
+        if not terms:
+            return None
+
+        expression = ' AND '.join(f'"{term}"*' for term in terms)
+        normalized = SearchService.normalize_part_number(search_query.strip()).replace('"', '""')
+        if normalized:
+            expression = f'({expression}) OR part_number_norm : "{normalized}"*'
+        return expression
+
+    @staticmethod
+    def is_available():
+        engine = db.engine
+        if engine.url not in _fts_ready:
+            ready = False
+            if engine.dialect.name == 'sqlite':
+                ready = db.session.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_fts'"
+                )).first() is not None
+            _fts_ready[engine.url] = ready
+        return _fts_ready[engine.url]
+
+    @staticmethod
+    def rebuild_index():
+        """Repopulates product_fts from the product table. Caller commits."""
+        for statement in FTS_REBUILD:
+            db.session.execute(text(statement))
+
+    @staticmethod
+    def search_ids(search_query, limit=None, offset=0, active_only=True):
+        """
+        Returns matching product ids, best match first.
+
+        Falls back to the ILIKE scan when the FTS index is not installed
+        (non-SQLite databases or before running migrate_search_index.py).
+        """
+        if not SearchService.is_available():
+            return SearchService._search_ids_like(search_query, limit, offset, active_only)
+
+        match = SearchService.build_match_query(search_query)
+        if not match:
+            return []
+
+        sql = f"""
+            SELECT product.id FROM product_fts
+            JOIN product ON product.id = product_fts.rowid
+            WHERE product_fts MATCH :match {'AND product.is_active = 1' if active_only else ''}
+            ORDER BY {_RANK}, product.id
+            LIMIT :limit OFFSET :offset
+        """
+        rows = db.session.execute(text(sql), {
+            'match': match,
+            'limit': limit if limit is not None else -1,
+            'offset': offset
+        })
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _search_ids_like(search_query, limit, offset, active_only):
+        pattern = f'%{search_query}%'
+        query = db.session.query(Product.id).filter(
+            (Product.name.ilike(pattern)) |
+            (Product.part_number.ilike(pattern)) |
+            (Product.compatibility.ilike(pattern)) |
+            (Product.manufacturer.ilike(pattern))
+        )
+        if active_only:
+            query = query.filter(Product.is_active == True)
+        query = query.order_by(Product.name, Product.id).offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return [row[0] for row in query]
+
+    @staticmethod
+    def search(search_query, limit=None, offset=0, active_only=True):
+        """
+        Searches products by name, part number, compatibility and manufacturer.
+
+        Args:
+            search_query (str): Free text typed by the user.
+            limit (int, optional): Maximum results.
+            offset (int): Results to skip.
+            active_only (bool): Exclude archived products.
+
+        Returns:
+            list: Product objects ordered by relevance.
+        """
+        ids = SearchService.search_ids(search_query, limit, offset, active_only)
+        by_id = {}
+        # Chunked to stay under SQLite's bound-parameter limit on broad searches
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            by_id.update((p.id, p) for p in ProductService.query().filter(Product.id.in_(chunk)))
+        return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,130 @@
+import threading
+import time
+from flask import current_app, has_app_context
+from app import db
+from app.models import Setting
+
+VERSION_KEY = 'settings_version'
+
+
+class SettingsCache:
+    """
+    In-process cache for settings-like values (exchange rate, etc.).
+
+    Entries expire after `ttl` seconds and are dropped explicitly with
+    `invalidate()` once a change is committed. When `version_check` is set,
+    the 'settings_version' row is polled at most that often and the whole
+    cache is cleared when another process has bumped it.
+
+    One instance lives in `app.extensions['settings_cache']`.
+    """
+
+    def __init__(self, ttl=300, version_check=5):
+        self.ttl = ttl
+        self.version_check = version_check
+        self._entries = {}  # key -> (value, expires_at)
+        self._lock = threading.Lock()  # Entries, generation and counters
+        self._generation = 0  # Bumped by every invalidation
+        self._version = None
+        self._next_version_check = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.version_checks = 0
+
+    @staticmethod
+    def init_app(app):
+        app.extensions['settings_cache'] = SettingsCache(
+            ttl=app.config.get('SETTINGS_CACHE_TTL', 300),
+            version_check=app.config.get('SETTINGS_CACHE_VERSION_CHECK', 5)
+        )
+
+    @staticmethod
+    def current():
+        """Cache of the active app, or None outside an application context."""
+        if not has_app_context():
+            return None
+        return current_app.extensions.get('settings_cache')
+
+    def get(self, key, loader):
+        """
+        Returns the cached value for `key`, calling `loader` on a miss.
+
+        Args:
+            key (str): Cache key.
+            loader (callable): Returns (value, ttl). A ttl of None uses the
+                cache default; a shorter one is honoured (e.g. a scheduled change).
+        """
+        self._check_version()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > now:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+
+        value, ttl = loader()
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            # An invalidation during the load may mean `value` is already stale
+            if self._generation == generation:
+                self._entries[key] = (value, now + ttl)
+        return value
+
+    def invalidate(self, key=None):
+        """Drops `key` (or everything). Call after the change is committed."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+            self._generation += 1
+            self.invalidations += 1
+            # Pick up our own version bump on the next read
+            self._next_version_check = 0.0
+
+    @staticmethod
+    def bump_version():
+        """
+        Increments the shared version so other processes drop their caches.
+        Runs in the caller's transaction; caller commits.
+        """
+        table = Setting.__table__
+        result = db.session.execute(
+            table.update().where(table.c.key == VERSION_KEY).values(
+                value=db.cast(db.cast(table.c.value, db.Integer) + 1, db.String)
+            )
+        )
+        if result.rowcount == 0:
+            db.session.add(Setting(key=VERSION_KEY, value='1'))
+
+    def _check_version(self):
+        if not self.version_check:
+            return
+        now = time.monotonic()
+        if now < self._next_version_check:
+            return
+        self._next_version_check = now + self.version_check
+        with self._lock:
+            self.version_checks += 1
+        version = db.session.query(Setting.value).filter(Setting.key == VERSION_KEY).scalar()
+        if version != self._version:
+            with self._lock:
+                self._entries.clear()
+                self._generation += 1
+                self._version = version
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else None,
+            'invalidations': self.invalidations,
+            'version_checks': self.version_checks,
+            'version': self._version,
+            'entries': len(self._entries),
+            'ttl': self.ttl
+        }
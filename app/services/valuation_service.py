@@ -0,0 +1,72 @@
+from app import db
+from app.models import Product, Category
+from app.services.pricing_service import PricingService
+
+# Dimensions valuation subtotals can be grouped by
+VALUATION_GROUPS = ('category', 'location')
+
+
+class ValuationService:
+    """
+    Inventory valuation (quantity * price_usd of active products) computed
+    with SQL aggregates, so totals never need the products in memory.
+    """
+
+    @staticmethod
+    def value_expression():
+        return Product.quantity * db.func.coalesce(Product.price_usd, 0)
+
+    @staticmethod
+    def totals():
+        """
+        Returns:
+            dict: products, units and value_usd over active products.
+        """
+        products, units, value = db.session.query(
+            db.func.count(Product.id),
+            db.func.coalesce(db.func.sum(Product.quantity), 0),
+            db.func.coalesce(db.func.sum(ValuationService.value_expression()), 0)
+        ).filter(Product.is_active == True).one()
+        return {'products': products, 'units': int(units), 'value_usd': round(float(value), 2)}
+
+    @staticmethod
+    def subtotals(group_by):
+        """
+        Valuation per category or per location, highest value first.
+
+        Returns:
+            list: dicts with name, products, units and value_usd.
+
+        Raises:
+            ValueError: If `group_by` is not one of VALUATION_GROUPS.
+        """
+        if group_by not in VALUATION_GROUPS:
+            raise ValueError("Agrupación inválida.")
+
+        query = db.session.query().select_from(Product)
+        if group_by == 'category':
+            group = db.func.coalesce(Category.name, 'Sin categoría')
+            query = query.outerjoin(Category, Product.category_id == Category.id)
+        else:
+            group = db.func.coalesce(db.func.nullif(Product.location, ''), 'Sin ubicación')
+        value = db.func.sum(ValuationService.value_expression())
+
+        rows = query.with_entities(
+            group, db.func.count(Product.id), db.func.sum(Product.quantity), value
+        ).filter(Product.is_active == True).group_by(group).order_by(value.desc(), group).all()
+        return [{
+            'name': name, 'products': products, 'units': int(units or 0), 'value_usd': round(float(total or 0), 2)
+        } for name, products, units, total in rows]
+
+    @staticmethod
+    def summary():
+        """Totals plus subtotals per category and per location, with Bs at the current rate."""
+        rate = PricingService.current_rate()
+        totals = ValuationService.totals()
+        totals['value_bs'] = round(totals['value_usd'] * rate, 2)
+        return {
+            'totals': totals,
+            'exchange_rate': rate,
+            'by_category': ValuationService.subtotals('category'),
+            'by_location': ValuationService.subtotals('location')
+        }
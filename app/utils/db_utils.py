@@ -0,0 +1,72 @@
+"""
+Database helpers.
+Provides a statement counter to detect N+1 query patterns and the stored
+date key used by keyset pagination.
+"""
+from contextlib import contextmanager
+from sqlalchemy import event, type_coerce
+from app import db
+
+
+def date_key(column):
+    """
+    Compares a DateTime column as stored instead of binding datetimes.
+
+    SQLite keeps dates as text in two formats (CURRENT_TIMESTAMP has no
+    microseconds, Python datetimes do), so a bound datetime would skip or
+    repeat rows at a keyset page boundary. Compare against the stored text
+    (a cursor read through this key) or a 'YYYY-MM-DD' prefix.
+    """
+    return type_coerce(column, db.String)
+
+
+def upsert_insert(table):
+    """
+    INSERT construct with on_conflict_do_update() for the active dialect.
+
+    Raises:
+        ValueError: If the database has no INSERT ... ON CONFLICT support here.
+    """
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise ValueError(f"Operación no soportada en la base de datos {dialect}.")
+    return insert(table)
+
+
+class QueryCounter:
+    """Collects the SQL statements executed while a `count_queries` block is active."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count statements sent to the database inside the block.
+
+    Must be used inside an application context.
+
+    Usage:
+        with count_queries() as counter:
+            client.get('/products/')
+        assert counter.count == 3
+    """
+    counter = QueryCounter()
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
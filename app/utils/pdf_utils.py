@@ -1,5 +1,10 @@
-from fpdf import FPDF
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from io import BytesIO
+from multiprocessing import get_context
+from fpdf import FPDF
+from pypdf import PdfReader, PdfWriter
+from app.utils.timing_utils import StageTimer
 
 class PDFReport(FPDF):
     def header(self):
@@ -22,43 +27,67 @@ class PDFReport(FPDF):
         self.multi_cell(0, 10, body)
         self.ln()
 
-    def add_table(self, header, data, col_widths):
+    def table_header(self, header, col_widths):
         self.set_font('helvetica', 'B', 10)
         for val, width in zip(header, col_widths):
             self.cell(width, 10, val, border=1, align='C')
         self.ln()
-        
         self.set_font('helvetica', '', 10)
+
+    def add_table(self, header, data, col_widths):
+        """
+        Renders `data` row by row. It may be any iterable (e.g. a generator
+        over a chunked query), so rows never need to be held in a list. The
+        header is repeated at the top of every page the table spans.
+        """
+        self.table_header(header, col_widths)
         for row in data:
+            if self.will_page_break(10):
+                self.add_page()
+                self.table_header(header, col_widths)
             for val, width in zip(row, col_widths):
                 self.cell(width, 10, str(val), border=1, align='C')
             self.ln()
 
-def generate_inventory_pdf(products):
+def generate_inventory_pdf(products, valuation, timer=None):
+    """
+    Args:
+        products (iterable): Rows with id, name, quantity and price_usd,
+            consumed lazily while the table is drawn.
+        valuation (dict): ValuationService.summary(); its totals and
+            category subtotals are printed after the table.
+        timer (StageTimer, optional): Records 'fetch' (waiting on rows) and
+            'render' (drawing them).
+
+    Returns:
+        PDFReport: Ready for output().
+    """
+    timer = timer or StageTimer()
     pdf = PDFReport()
     pdf.add_page()
     pdf.chapter_title(f'Reporte de Inventario - {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}')
     
     header = ['ID', 'Nombre', 'Cantidad', 'Precio ($)', 'Total ($)']
     col_widths = [15, 80, 25, 30, 30]
-    
-    data = []
-    total_val = 0
-    for p in products:
-        row_total = p.quantity * (p.price_usd or 0)
-        total_val += row_total
-        data.append([
-            str(p.id),
-            p.name,
-            str(p.quantity),
-            f"{p.price_usd:.2f}" if p.price_usd else "0.00",
-            f"{row_total:.2f}"
-        ])
-    
-    pdf.add_table(header, data, col_widths)
-    pdf.ln(10)
-    pdf.set_font('helvetica', 'B', 12)
-    pdf.cell(0, 10, f"Valor Total del Inventario: ${total_val:.2f}", 0, 1, 'R')
+
+    def rows():
+        for p in timer.iterate('fetch', products):
+            yield (
+                p.id,
+                p.name,
+                p.quantity,
+                f"{p.price_usd:.2f}" if p.price_usd else "0.00",
+                f"{p.quantity * (p.price_usd or 0):.2f}"
+            )
+
+    with timer.stage('render'):
+        pdf.add_table(header, rows(), col_widths)
+        pdf.ln(10)
+        pdf.set_font('helvetica', '', 10)
+        for subtotal in valuation['by_category']:
+            pdf.cell(0, 8, f"{subtotal['name']}: ${subtotal['value_usd']:.2f}", 0, 1, 'R')
+        pdf.set_font('helvetica', 'B', 12)
+        pdf.cell(0, 10, f"Valor Total del Inventario: ${valuation['totals']['value_usd']:.2f}", 0, 1, 'R')
     
     return pdf
 
@@ -83,3 +112,113 @@ def generate_sales_pdf(sales_data):
     pdf.cell(0, 10, f"Total Ventas Periodo: ${total_sales:.2f}", 0, 1, 'L')
     
     return pdf
+
+class SectionReport(PDFReport):
+    """One part of a multi-section report. Parts are rendered separately and
+    merged, so the footer names the section instead of numbering pages."""
+
+    def __init__(self, label):
+        super().__init__()
+        self.label = label
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font('helvetica', 'I', 8)
+        self.cell(0, 10, self.label, align='C')
+
+def render_section_part(part):
+    """
+    Renders one part of a section to PDF bytes. Top-level and fed plain
+    values only, so it can run in a worker process.
+
+    Args:
+        part (dict): label, title (None for continuation parts), header,
+            col_widths, rows and summary (lines printed after the table,
+            last part only).
+    """
+    pdf = SectionReport(part['label'])
+    pdf.add_page()
+    if part['title']:
+        pdf.chapter_title(part['title'])
+    pdf.add_table(part['header'], part['rows'], part['col_widths'])
+    if part['summary']:
+        pdf.ln(10)
+        pdf.set_font('helvetica', 'B', 12)
+        for line in part['summary']:
+            pdf.cell(0, 10, line, 0, 1, 'R')
+    return bytes(pdf.output())
+
+def split_sections(sections, label, chunk_rows=5000):
+    """
+    Splits sections into parts of at most `chunk_rows` rows, so one large
+    table does not leave the other workers idle.
+
+    Args:
+        sections (list): dicts with title, header, col_widths, rows and summary.
+        label (str): Footer text, e.g. the report name and period.
+
+    Returns:
+        list: Parts for render_section_part, in document order.
+    """
+    parts = []
+    for section in sections:
+        rows = section['rows']
+        starts = range(0, len(rows), chunk_rows) if rows else [0]
+        for i, start in enumerate(starts):
+            last = start + chunk_rows >= len(rows)
+            parts.append({
+                'label': f"{label} - {section['title']}",
+                'title': section['title'] if i == 0 else None,
+                'header': section['header'],
+                'col_widths': section['col_widths'],
+                'rows': rows[start:start + chunk_rows],
+                'summary': section['summary'] if last else [],
+                'section': section['title'] if i == 0 else None
+            })
+    return parts
+
+def section_process_pool(processes):
+    """
+    Process pool for render_sections (fpdf2 is pure Python, so threads would
+    share one core). Create it once and reuse it: every worker is spawned and
+    re-imports the parent's `__main__`, so a script using it must guard its
+    entry point with `if __name__ == '__main__':`.
+    """
+    # spawn: forking a threaded web worker (report jobs run on threads) can deadlock
+    return ProcessPoolExecutor(max_workers=processes, mp_context=get_context('spawn'))
+
+
+def render_sections(sections, label, pool=None, chunk_rows=5000, min_parallel_rows=0, timer=None):
+    """
+    Renders sections into one PDF. Parts render on `pool` when there is one
+    and the report is large enough to repay the inter-process copies, then
+    are merged in order with pypdf; each section gets a bookmark.
+
+    Args:
+        pool (Executor, optional): From section_process_pool; None renders serially.
+        min_parallel_rows (int): Below this many table rows, render serially anyway.
+        timer (StageTimer, optional): Records 'render' and 'merge'.
+
+    Returns:
+        bytes: The merged PDF.
+    """
+    timer = timer or StageTimer()
+    parts = split_sections(sections, label, chunk_rows)
+    rows = sum(len(section['rows']) for section in sections)
+
+    with timer.stage('render'):
+        if pool is not None and len(parts) > 1 and rows >= min_parallel_rows:
+            rendered = list(pool.map(render_section_part, parts))
+        else:
+            rendered = [render_section_part(part) for part in parts]
+
+    with timer.stage('merge'):
+        writer = PdfWriter()
+        for part, data in zip(parts, rendered):
+            first_page = len(writer.pages)
+            writer.append(PdfReader(BytesIO(data)))
+            if part['section']:
+                writer.add_outline_item(part['section'], first_page)
+        out = BytesIO()
+        writer.write(out)
+    return out.getvalue()
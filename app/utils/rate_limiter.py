@@ -0,0 +1,278 @@
+"""
+Login rate limiting.
+Sliding-window failure counters that answer "is this username/IP locked and
+for how long" without touching the database, plus a recorder that persists
+login attempts to LoginAttempt in batches from a background thread.
+"""
+import atexit
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from flask import current_app
+from app import db
+from app.models import LoginAttempt
+
+
+class MemoryBackend:
+    """
+    Per-process counters. Each key keeps at most `max_attempts` failure
+    timestamps, so recording and checking are O(1).
+
+    Counters are not shared between worker processes: with N workers an
+    attacker gets up to N * max_attempts tries per window. Use RedisBackend
+    when that matters.
+    """
+
+    def __init__(self, max_attempts, window, lockout):
+        self.max_attempts = max_attempts
+        self.window = window
+        self.lockout = lockout
+        self._failures = {}  # key -> deque of timestamps, oldest first
+        self._locked_until = {}  # key -> timestamp
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def record_failure(self, keys, now):
+        """Returns True if this failure locked a key that wasn't locked."""
+        locked = False
+        with self._lock:
+            for key in keys:
+                failures = self._failures.get(key)
+                if failures is None:
+                    failures = self._failures[key] = deque(maxlen=self.max_attempts)
+                failures.append(now)
+                if len(failures) == self.max_attempts and failures[0] > now - self.window:
+                    locked = locked or self._locked_until.get(key, 0) <= now
+                    self._locked_until[key] = now + self.lockout
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune(now)
+        return locked
+
+    def locked_until(self, keys, now):
+        until = max((self._locked_until.get(key, 0) for key in keys), default=0)
+        return until if until > now else None
+
+    def clear(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+            self._locked_until.pop(key, None)
+
+    def _prune(self, now):
+        """Drops keys whose failures have all left the window."""
+        for key in [k for k, failures in self._failures.items() if failures[-1] <= now - self.window]:
+            del self._failures[key]
+        for key in [k for k, until in self._locked_until.items() if until <= now]:
+            del self._locked_until[key]
+
+
+class RedisBackend:
+    """
+    Counters in Redis (or a compatible server), shared by every worker
+    process. Failures are a sorted set per key trimmed to the window; the
+    lock is a key that expires on its own.
+
+    Requires the optional `redis` package.
+    """
+
+    def __init__(self, url, max_attempts, window, lockout, prefix='login:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("LOGIN_LIMITER_BACKEND='redis' requires the redis package")
+        self.client = redis.Redis.from_url(url)
+        self.max_attempts = max_attempts
+        self.window = window
+        self.lockout = lockout
+        self.prefix = prefix
+
+    def record_failure(self, keys, now):
+        pipe = self.client.pipeline()
+        for key in keys:
+            failures = f'{self.prefix}failures:{key}'
+            pipe.zadd(failures, {repr(now): now})
+            pipe.zremrangebyscore(failures, 0, now - self.window)
+            pipe.zcard(failures)
+            pipe.expire(failures, int(self.window) + 1)
+        results = pipe.execute()
+
+        pipe = self.client.pipeline()
+        for i, key in enumerate(keys):
+            if results[i * 4 + 2] >= self.max_attempts:
+                pipe.set(f'{self.prefix}locked:{key}', now + self.lockout, px=int(self.lockout * 1000))
+        pipe.execute()
+        return any(results[i * 4 + 2] == self.max_attempts for i in range(len(keys)))
+
+    def locked_until(self, keys, now):
+        values = self.client.mget([f'{self.prefix}locked:{key}' for key in keys])
+        until = max((float(value) for value in values if value is not None), default=0)
+        return until if until > now else None
+
+    def clear(self, key):
+        self.client.delete(f'{self.prefix}failures:{key}', f'{self.prefix}locked:{key}')
+
+
+class AttemptRecorder:
+    """
+    Queues LoginAttempt writes and clears, and applies them in order from a
+    background thread in one transaction per batch. With interval=0 every
+    operation is written immediately (tests, scripts).
+
+    The queue is flushed at exit and whenever a failure starts a lockout,
+    but not on SIGKILL or a crash: the operations of the last `interval`
+    seconds can then be lost. Lost failures that did not lock anything only
+    give an attacker those attempts again after the restart; a lost success
+    leaves a gap in the audit log; a lost clear brings back that user's
+    pre-login failures for at most one window.
+    """
+
+    def __init__(self, app, interval=0.5, batch_size=200):
+        self.app = app
+        self.interval = interval
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # Keeps batches in queue order across flushing threads
+
+    def add(self, op):
+        """op: ('attempt', row dict) or ('clear', username, since, until)."""
+        if not self.interval:
+            self._write([op])
+            return
+        self._queue.put(op)
+        if self._thread is None:
+            self._start()
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name='login-attempts', daemon=True)
+                self._thread.start()
+                atexit.register(self.flush)
+
+    def _loop(self):
+        while True:
+            time.sleep(self.interval)
+            self.flush()
+
+    def flush(self):
+        """Writes everything queued so far."""
+        with self._flush_lock:
+            while True:
+                ops = []
+                try:
+                    while len(ops) < self.batch_size:
+                        ops.append(self._queue.get_nowait())
+                except queue.Empty:
+                    pass
+                if not ops:
+                    return
+                self._write(ops)
+
+    def _write(self, ops):
+        with self.app.app_context():
+            try:
+                pending = []
+                for op in ops:
+                    if op[0] == 'attempt':
+                        pending.append(op[1])
+                        continue
+                    if pending:
+                        db.session.execute(db.insert(LoginAttempt), pending)
+                        pending = []
+                    # Bounded by `until`: failures recorded after the clear survive it
+                    _, username, since, until = op
+                    LoginAttempt.query.filter(
+                        LoginAttempt.username == username,
+                        LoginAttempt.success == False,
+                        LoginAttempt.timestamp >= since,
+                        LoginAttempt.timestamp <= until
+                    ).delete(synchronize_session=False)
+                if pending:
+                    db.session.execute(db.insert(LoginAttempt), pending)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                current_app.logger.exception('Could not persist %d login attempt operations', len(ops))
+
+
+class LoginLimiter:
+    """
+    Locks a username or IP address for `lockout` seconds once it reaches
+    `max_attempts` failed logins within `window` seconds. Username and IP
+    are counted separately.
+
+    One instance lives in `app.extensions['login_limiter']`. The memory
+    backend is warmed from LoginAttempt on first use (one query per
+    process), so a restart does not reset the counters; after that, checks
+    and records never wait on the database.
+    """
+
+    def __init__(self, backend, recorder, window):
+        self.backend = backend
+        self.recorder = recorder
+        self.window = window
+        self._warm = not isinstance(backend, MemoryBackend)
+        self._warm_lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        max_attempts = app.config.get('LOGIN_MAX_ATTEMPTS', 5)
+        window = app.config.get('LOGIN_ATTEMPT_WINDOW_MINUTES', 15) * 60
+        lockout = app.config.get('LOGIN_LOCKOUT_MINUTES', 15) * 60
+        if app.config.get('LOGIN_LIMITER_BACKEND', 'memory') == 'redis':
+            backend = RedisBackend(app.config['LOGIN_LIMITER_REDIS_URL'], max_attempts, window, lockout)
+        else:
+            backend = MemoryBackend(max_attempts, window, lockout)
+        recorder = AttemptRecorder(app, interval=app.config.get('LOGIN_ATTEMPT_FLUSH_INTERVAL', 0.5))
+        app.extensions['login_limiter'] = LoginLimiter(backend, recorder, window)
+
+    @staticmethod
+    def current():
+        return current_app.extensions['login_limiter']
+
+    @staticmethod
+    def _keys(username, ip_address):
+        return (f'user:{username}', f'ip:{ip_address}')
+
+    def _warm_up(self):
+        """Replays the failures that can still count or lock from LoginAttempt (one query)."""
+        with self._warm_lock:
+            if self._warm:
+                return
+            # Failures older than the window still matter while the lock they caused lasts
+            cutoff = datetime.now() - timedelta(seconds=self.window + self.backend.lockout)
+            rows = db.session.query(LoginAttempt.username, LoginAttempt.ip_address, LoginAttempt.timestamp).filter(
+                LoginAttempt.success == False, LoginAttempt.timestamp >= cutoff
+            ).order_by(LoginAttempt.timestamp).all()
+            for username, ip_address, timestamp in rows:
+                self.backend.record_failure(self._keys(username, ip_address), timestamp.timestamp())
+            self._warm = True
+
+    def lockout_remaining(self, username, ip_address):
+        """Seconds until the username/IP may try again, or None if not locked."""
+        if not self._warm:
+            self._warm_up()
+        now = time.time()
+        until = self.backend.locked_until(self._keys(username, ip_address), now)
+        return None if until is None else until - now
+
+    def record(self, username, ip_address, success, user_agent=None):
+        """Counts the attempt and queues it for persistence."""
+        now = datetime.now()
+        locked = not success and self.backend.record_failure(self._keys(username, ip_address), now.timestamp())
+        self.recorder.add(('attempt', {
+            'username': username, 'ip_address': ip_address, 'success': success,
+            'user_agent': user_agent, 'timestamp': now
+        }))
+        if locked:
+            self.recorder.flush()  # A lockout must survive a crash
+
+    def clear(self, username):
+        """Forgets the username's failures after a successful login."""
+        self.backend.clear(f'user:{username}')
+        now = datetime.now()
+        self.recorder.add(('clear', username, now - timedelta(seconds=self.window), now))
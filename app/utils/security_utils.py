@@ -5,8 +5,10 @@ Provides rate limiting, attempt tracking, and security monitoring.
 from datetime import datetime, timedelta
 from app import db
 from app.models import LoginAttempt
+from app.utils.rate_limiter import LoginLimiter
 
-# Configuration
+# Defaults; the limiter reads LOGIN_MAX_ATTEMPTS, LOGIN_LOCKOUT_MINUTES and
+# LOGIN_ATTEMPT_WINDOW_MINUTES from the app config
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION_MINUTES = 15
 ATTEMPT_WINDOW_MINUTES = 15
@@ -14,7 +16,7 @@ ATTEMPT_WINDOW_MINUTES = 15
 
 def log_login_attempt(username, ip_address, success=False, user_agent=None):
     """
-    Log a login attempt to the database.
+    Count a login attempt in the rate limiter and queue it for the database.
     
     Args:
         username (str): Username attempted
@@ -22,14 +24,7 @@ def log_login_attempt(username, ip_address, success=False, user_agent=None):
         success (bool): Whether login was successful
         user_agent (str): Browser/device user agent string
     """
-    attempt = LoginAttempt(
-        username=username,
-        ip_address=ip_address,
-        success=success,
-        user_agent=user_agent
-    )
-    db.session.add(attempt)
-    db.session.commit()
+    LoginLimiter.current().record(username, ip_address, success, user_agent)
 
 
 def get_failed_attempts(username, ip_address, minutes=ATTEMPT_WINDOW_MINUTES):
@@ -46,37 +41,22 @@ def get_failed_attempts(username, ip_address, minutes=ATTEMPT_WINDOW_MINUTES):
     """
     cutoff_time = datetime.now() - timedelta(minutes=minutes)
     
-    # Count failed attempts for this username OR this IP
-    count = LoginAttempt.query.filter(
-        db.or_(
-            LoginAttempt.username == username,
-            LoginAttempt.ip_address == ip_address
-        ),
-        LoginAttempt.success == False,
-        LoginAttempt.timestamp >= cutoff_time
-    ).count()
-    
-    return count
-
-
-def is_account_locked(username, ip_address):
-    """
-    Check if account/IP is currently locked due to too many failed attempts.
-    
-    Args:
-        username (str): Username to check
-        ip_address (str): IP address to check
-        
-    Returns:
-        bool: True if locked, False otherwise
-    """
-    failed_count = get_failed_attempts(username, ip_address)
-    return failed_count >= MAX_LOGIN_ATTEMPTS
+    # Failed attempts for this username OR this IP. An OR across two columns
+    # cannot use one index, so each side is its own SELECT served by a
+    # composite (column, success, timestamp) index and UNION drops the
+    # attempts matching both.
+    failed = db.and_(LoginAttempt.success == False, LoginAttempt.timestamp >= cutoff_time)
+    matching = db.union(
+        db.select(LoginAttempt.id).where(LoginAttempt.username == username, failed),
+        db.select(LoginAttempt.id).where(LoginAttempt.ip_address == ip_address, failed)
+    ).subquery()
+    
+    return db.session.query(db.func.count()).select_from(matching).scalar()
 
 
 def get_lockout_time_remaining(username, ip_address):
     """
-    Get the time remaining until account unlock.
+    Get the time remaining until unlock. Also serves as the lock check.
     
     Args:
         username (str): Username to check
@@ -85,32 +65,11 @@ def get_lockout_time_remaining(username, ip_address):
     Returns:
         dict: {'minutes': int, 'seconds': int, 'total_seconds': int} or None if not locked
     """
-    if not is_account_locked(username, ip_address):
+    remaining = LoginLimiter.current().lockout_remaining(username, ip_address)
+    if remaining is None:
         return None
     
-    cutoff_time = datetime.now() - timedelta(minutes=ATTEMPT_WINDOW_MINUTES)
-    
-    # Get the most recent failed attempt
-    last_attempt = LoginAttempt.query.filter(
-        db.or_(
-            LoginAttempt.username == username,
-            LoginAttempt.ip_address == ip_address
-        ),
-        LoginAttempt.success == False,
-        LoginAttempt.timestamp >= cutoff_time
-    ).order_by(LoginAttempt.timestamp.desc()).first()
-    
-    if not last_attempt:
-        return None
-    
-    # Calculate unlock time
-    unlock_time = last_attempt.timestamp + timedelta(minutes=LOCKOUT_DURATION_MINUTES)
-    time_remaining = unlock_time - datetime.now()
-    
-    if time_remaining.total_seconds() <= 0:
-        return None
-    
-    total_seconds = int(time_remaining.total_seconds())
+    total_seconds = max(int(remaining), 1)
     minutes = total_seconds // 60
     seconds = total_seconds % 60
     
@@ -128,16 +87,7 @@ def clear_successful_attempts(username):
     Args:
         username (str): Username that successfully logged in
     """
-    cutoff_time = datetime.now() - timedelta(minutes=ATTEMPT_WINDOW_MINUTES)
-    
-    # Delete recent failed attempts for this username
-    LoginAttempt.query.filter(
-        LoginAttempt.username == username,
-        LoginAttempt.success == False,
-        LoginAttempt.timestamp >= cutoff_time
-    ).delete()
-    
-    db.session.commit()
+    LoginLimiter.current().clear(username)
 
 
 def cleanup_old_attempts(days=30):
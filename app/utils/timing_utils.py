@@ -0,0 +1,58 @@
+"""
+Timing helpers.
+Measures the stages of long-running work (report generation) so slow steps
+show up in the logs and in the Server-Timing response header.
+"""
+import time
+from contextlib import contextmanager
+
+
+class StageTimer:
+    """
+    Accumulates wall time per named stage.
+
+    Stages may nest; each stage records only its own time, so a 'fetch'
+    stage inside 'render' is not counted twice.
+
+    Usage:
+        timer = StageTimer()
+        with timer.stage('render'):
+            for row in timer.iterate('fetch', rows):
+                ...
+        response.headers['Server-Timing'] = timer.server_timing()
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self._stack = []
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._stack.pop()
+            elapsed = time.perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed - nested
+            if self._stack:
+                self._stack[-1] += elapsed
+
+    def iterate(self, name, iterable):
+        """Yields from `iterable`, timing each step (e.g. fetching rows) as stage `name`."""
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def as_dict(self):
+        """Milliseconds per stage."""
+        return {name: round(seconds * 1000, 1) for name, seconds in self.durations.items()}
+
+    def server_timing(self):
+        return ', '.join(f'{name};dur={ms}' for name, ms in self.as_dict().items())
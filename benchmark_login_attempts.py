@@ -0,0 +1,159 @@
+"""
+Benchmark for the failed-login count: OR query on the original indexes vs.
+the UNION of two index-served SELECTs on the composite indexes.
+
+The UNION is get_failed_attempts, used for audit and ad-hoc lookups. The
+login path does not run it: the limiter answers from memory and reads
+LoginAttempt once per process.
+
+Seeds a throwaway SQLite database with --rows login attempts: most spread
+over the last 30 days and --burst-share of them inside the last 15 minutes,
+as during a credential-stuffing run. Then times both queries for a sample
+of username/IP pairs and prints their query plans.
+
+Usage:
+    python benchmark_login_attempts.py [--rows 1000000] [--burst-share 0.2] [--lookups 200]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from config import Config
+from app import create_app, db
+
+ORIGINAL_INDEXES = ('CREATE INDEX ix_login_attempt_username ON login_attempt (username)',)
+COMPOSITE_INDEXES = ('ix_login_attempt_username_success_timestamp', 'ix_login_attempt_ip_success_timestamp')
+
+
+def build_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        TESTING = True
+
+    return create_app(BenchConfig)
+
+
+def seed(n_rows, burst_share):
+    rng = random.Random(7)
+    now = datetime.now()
+    burst = int(n_rows * burst_share)
+
+    def rows():
+        for i in range(n_rows):
+            if i < burst:
+                when = now - timedelta(seconds=rng.uniform(0, 14 * 60))
+            else:
+                when = now - timedelta(seconds=rng.uniform(15 * 60, 30 * 86400))
+            yield (
+                f'user{rng.randrange(50_000)}',
+                f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+                when.strftime('%Y-%m-%d %H:%M:%S.%f'),
+                rng.random() < 0.1,
+                'benchmark'
+            )
+
+    connection = db.engine.raw_connection()
+    try:
+        connection.executemany(
+            'INSERT INTO login_attempt (username, ip_address, timestamp, success, user_agent) VALUES (?, ?, ?, ?, ?)',
+            rows()
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def legacy_failed_attempts(username, ip_address, minutes=15):
+    """The original OR query, kept here as the baseline."""
+    from app.models import LoginAttempt
+
+    cutoff_time = datetime.now() - timedelta(minutes=minutes)
+    return LoginAttempt.query.filter(
+        db.or_(
+            LoginAttempt.username == username,
+            LoginAttempt.ip_address == ip_address
+        ),
+        LoginAttempt.success == False,
+        LoginAttempt.timestamp >= cutoff_time
+    ).count()
+
+
+def set_indexes(composite):
+    with db.engine.begin() as conn:
+        if composite:
+            conn.exec_driver_sql('DROP INDEX IF EXISTS ix_login_attempt_username')
+            conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_login_attempt_username_success_timestamp '
+                                 'ON login_attempt (username, success, timestamp)')
+            conn.exec_driver_sql('CREATE INDEX IF NOT EXISTS ix_login_attempt_ip_success_timestamp '
+                                 'ON login_attempt (ip_address, success, timestamp)')
+        else:
+            for name in COMPOSITE_INDEXES:
+                conn.exec_driver_sql(f'DROP INDEX IF EXISTS {name}')
+            for statement in ORIGINAL_INDEXES:
+                conn.exec_driver_sql(statement)
+        conn.exec_driver_sql('ANALYZE login_attempt')
+
+
+def query_plan(fn, pair):
+    """EXPLAIN QUERY PLAN of the SELECT `fn` runs."""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    db.event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        fn(*pair)
+    finally:
+        db.event.remove(db.engine, 'before_cursor_execute', capture)
+    statement, parameters = statements[-1]
+    with db.engine.connect() as conn:
+        rows = conn.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).fetchall()
+    return '\n'.join(f'    {row[-1]}' for row in rows)
+
+
+def run(label, fn, pairs):
+    started = time.perf_counter()
+    total = sum(fn(username, ip) for username, ip in pairs)
+    elapsed = time.perf_counter() - started
+    print(f'{label:<34} {elapsed / len(pairs) * 1000:8.2f} ms/lookup   ({total} failures counted)')
+    print(query_plan(fn, pairs[0]))
+    db.session.remove()
+    return elapsed
+
+
+def main():
+    from app.models import LoginAttempt
+    from app.utils.security_utils import get_failed_attempts
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--burst-share', type=float, default=0.2)
+    parser.add_argument('--lookups', type=int, default=200)
+    args = parser.parse_args()
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        seed(args.rows, args.burst_share)
+        print(f'{args.rows} login attempts seeded in {time.perf_counter() - started:.1f} s\n')
+
+        pairs = db.session.query(LoginAttempt.username, LoginAttempt.ip_address).order_by(
+            db.func.random()
+        ).limit(args.lookups).all()
+        db.session.remove()  # Index changes need the session's read transaction closed
+
+        set_indexes(composite=False)
+        legacy = run('OR, original indexes', legacy_failed_attempts, pairs)
+        set_indexes(composite=True)
+        run('OR, composite indexes', legacy_failed_attempts, pairs)
+        union = run('UNION, composite indexes', get_failed_attempts, pairs)
+        print(f'\nSpeedup (UNION + composite vs. original): {legacy / union:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark for the month-end report: serial vs. process-pool section rendering.
+
+Seeds a throwaway SQLite database with a synthetic catalog, movements and
+sales for the current month, fetches the report sections once and renders
+them serially and across a process pool, reporting wall time per stage.
+The pool is started before timing, as the report runner keeps one per app.
+
+Usage:
+    python benchmark_month_end_report.py [--products 100000] [--processes N] [--chunk-rows 5000]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, date
+
+from config import Config
+from app import create_app, db
+from app.utils.timing_utils import StageTimer
+
+
+def build_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        TESTING = True
+
+    return create_app(BenchConfig)
+
+
+def seed(n_products):
+    from app.models import User, Category, Product, InventoryMovement, SalesDaily, SalesDailyItem
+    from app.services.activity_service import ActivityService
+
+    rng = random.Random(42)
+    sellers = [User(username=f'vendedor{i}', email=f'v{i}@example.com', role='seller') for i in range(5)]
+    for user in sellers:
+        user.set_password('bench')
+    categories = [Category(name=f'Categoria {i}') for i in range(12)]
+    db.session.add_all(sellers + categories)
+    db.session.flush()
+
+    db.session.execute(db.insert(Product), [{
+        'name': f'Repuesto {i}',
+        'quantity': rng.randint(0, 50),
+        'price_usd': round(rng.uniform(1, 300), 2),
+        'part_number': f'BN-{i:07d}',
+        'category_id': categories[i % len(categories)].id,
+        'min_stock': 3
+    } for i in range(n_products)])
+
+    # A fifth of the catalog moves this month; the rest shows up as no rotation
+    today = date.today()
+    moved = rng.sample(range(1, n_products + 1), n_products // 5)
+    db.session.execute(db.insert(InventoryMovement), [{
+        'product_id': product_id,
+        'type': rng.choice(('entrada', 'salida', 'salida', 'ajuste')),
+        'quantity': rng.randint(1, 5),
+        'date': datetime(today.year, today.month, rng.randint(1, today.day), 10, 0),
+        'description': 'Movimiento de prueba',
+        'user_id': sellers[0].id
+    } for product_id in moved])
+
+    days = sorted({datetime(today.year, today.month, rng.randint(1, today.day)).date() for _ in range(today.day)})
+    items = {}
+    for product_id in moved[:5000]:
+        key = (rng.choice(days), product_id, rng.choice(sellers).id)
+        items[key] = {'day': key[0], 'product_id': product_id, 'user_id': key[2],
+                      'units': 1, 'total_usd': 10.0, 'total_bs': 400.0}
+    db.session.execute(db.insert(SalesDailyItem), list(items.values()))
+    db.session.execute(db.insert(SalesDaily), [{
+        'day': day, 'sale_count': 10, 'total_usd': 100.0, 'total_bs': 4000.0
+    } for day in days])
+    ActivityService.rebuild()
+    db.session.commit()
+
+
+def run(label, sections, pool, chunk_rows):
+    from app.utils.pdf_utils import render_sections
+
+    timer = StageTimer()
+    started = time.perf_counter()
+    data = render_sections(sections, 'Benchmark', pool=pool, chunk_rows=chunk_rows, timer=timer)
+    elapsed = time.perf_counter() - started
+    stages = ', '.join(f'{name} {ms / 1000:.2f} s' for name, ms in timer.as_dict().items())
+    print(f'{label:<20} {elapsed:8.2f} s   ({stages}; {len(data) / 1e6:.1f} MB)')
+    return elapsed
+
+
+def main():
+    from app.services.report_service import ReportService
+    from app.utils.pdf_utils import section_process_pool
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-rows', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        seed(args.products)
+
+        started = time.perf_counter()
+        today = date.today()
+        sections = ReportService.month_end_sections(today.year, today.month)
+        rows = sum(len(section['rows']) for section in sections)
+        print(f'{args.products} products, {rows} table rows; sections fetched in '
+              f'{time.perf_counter() - started:.2f} s\n')
+
+        serial = run('serial', sections, None, args.chunk_rows)
+        with section_process_pool(args.processes) as pool:
+            list(pool.map(abs, range(args.processes)))  # Spawn the workers outside the timing
+            parallel = run(f'{args.processes} processes', sections, pool, args.chunk_rows)
+        print(f'\nSpeedup: {serial / parallel:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,128 @@
+"""
+Benchmark for sale creation: per-line path vs. the bulk SalesService path.
+
+Seeds a throwaway SQLite database, then creates the same workshop orders
+both ways and reports sales/second and SQL statements per sale.
+
+Usage:
+    python benchmark_sales.py [--sales 50] [--lines 40] [--products 5000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from config import Config
+from app import create_app, db
+from app.utils.db_utils import count_queries
+
+
+def build_app(db_path):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        TESTING = True
+
+    return create_app(BenchConfig)
+
+
+def seed(n_products):
+    from app.models import User, Product
+
+    user = User(username='bench', email='bench@example.com', role='seller')
+    user.set_password('bench')
+    db.session.add(user)
+    db.session.add_all(Product(
+        name=f'Repuesto {i}',
+        quantity=1_000_000,
+        price_usd=1.0 + i % 100,
+        part_number=f'BN-{i:07d}'
+    ) for i in range(n_products))
+    db.session.commit()
+    return user.id
+
+
+def legacy_create_sale(items_data, user_id, rate):
+    """The original sales.create_sale loop, kept here as the baseline."""
+    from app.models import Product, Sale, SaleItem
+    from app.services.inventory_service import InventoryService
+
+    total_bs = 0
+    total_usd = 0
+    new_sale = Sale(total_bs=0, total_usd=0, user_id=user_id)
+    db.session.add(new_sale)
+    db.session.flush()
+
+    for item in items_data:
+        product = Product.query.get(item['product_id'])
+        if not product:
+            continue
+        quantity = int(item['quantity'])
+        InventoryService.remove_stock(
+            product_id=product.id,
+            quantity=quantity,
+            description=f"Venta #{new_sale.id}",
+            user_id=user_id
+        )
+        price_usd = product.price_usd if product.price_usd else 0
+        price_bs = price_usd * rate
+        db.session.add(SaleItem(
+            sale_id=new_sale.id,
+            product_id=product.id,
+            product_name=product.name,
+            quantity=quantity,
+            price_at_moment_bs=price_bs,
+            price_at_moment_usd=price_usd
+        ))
+        total_bs += price_bs * quantity
+        total_usd += price_usd * quantity
+
+    new_sale.total_bs = total_bs
+    new_sale.total_usd = total_usd
+    return new_sale
+
+
+def run(label, create, orders, user_id):
+    elapsed = 0.0
+    statements = 0
+    for items in orders:
+        db.session.expire_all()  # Each request starts with a cold session
+        with count_queries() as counter:
+            start = time.perf_counter()
+            create(items, user_id, 40.0)
+            db.session.commit()
+            elapsed += time.perf_counter() - start
+        statements += counter.count
+
+    n = len(orders)
+    print(f'{label:<8} {n / elapsed:10.1f} sales/s {elapsed / n * 1000:10.2f} ms/sale {statements / n:10.1f} queries/sale')
+    return n / elapsed
+
+
+def main():
+    from app.services.sales_service import SalesService
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sales', type=int, default=50)
+    parser.add_argument('--lines', type=int, default=40)
+    parser.add_argument('--products', type=int, default=5000)
+    args = parser.parse_args()
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'bench.db'))
+    with app.app_context():
+        db.create_all()
+        user_id = seed(args.products)
+
+        orders = [
+            [{'product_id': 1 + (s * args.lines + i) % args.products, 'quantity': 1 + i % 3}
+             for i in range(args.lines)]
+            for s in range(args.sales)
+        ]
+
+        print(f'{args.sales} sales x {args.lines} lines, {args.products} products\n')
+        legacy = run('legacy', legacy_create_sale, orders, user_id)
+        bulk = run('bulk', SalesService.create_sale, orders, user_id)
+        print(f'\nSpeedup: {bulk / legacy:.1f}x')
+
+
+if __name__ == '__main__':
+    main()
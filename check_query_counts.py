@@ -0,0 +1,103 @@
+"""
+Query-count regression check for product listings.
+
+Renders the product list, the categories list, the products API and the
+inventory PDF for catalogs of different sizes against a throwaway SQLite
+database and fails if the number of SQL statements grows with the number
+of products (N+1).
+
+Usage:
+    python check_query_counts.py
+"""
+import os
+import sys
+import tempfile
+
+from config import Config
+from app import create_app, db
+from app.utils.db_utils import count_queries
+
+SIZES = (10, 200)
+PATHS = (
+    '/products/',
+    '/categories/',
+    '/api/products',
+    '/reports/download/inventory',
+)
+
+
+def build_app(db_path):
+    class CheckConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        TESTING = True
+        REPORT_JOB_WORKERS = 0  # Render queued reports inline so they are counted
+        REPORT_CACHE_DIR = os.path.join(os.path.dirname(db_path), 'report_cache')
+
+    return create_app(CheckConfig)
+
+
+def seed(app, n_products):
+    from app.models import User, Category, Product
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username='admin', email='admin@example.com', is_admin=True, role='admin')
+        admin.set_password('admin123')
+        db.session.add(admin)
+
+        categories = [Category(name=f'Categoria {i}') for i in range(5)]
+        db.session.add_all(categories)
+        db.session.flush()
+
+        for i in range(n_products):
+            db.session.add(Product(
+                name=f'Producto {i}',
+                quantity=i % 10,
+                price_usd=1.0 + i,
+                part_number=f'PN-{i:06d}',
+                category_id=categories[i % len(categories)].id,
+                min_stock=2
+            ))
+        db.session.commit()
+
+
+def measure(n_products):
+    db_path = os.path.join(tempfile.mkdtemp(), 'check.db')
+    app = build_app(db_path)
+    seed(app, n_products)
+
+    client = app.test_client()
+    client.post('/auth/login', data={'username': 'admin', 'password': 'admin123'})
+
+    counts = {}
+    with app.app_context():
+        for path in PATHS:
+            with count_queries() as counter:
+                response = client.get(path, follow_redirects=True)
+                response.get_data()  # Drain streamed bodies
+            if response.status_code != 200:
+                raise RuntimeError(f'{path} returned {response.status_code}')
+            counts[path] = counter.count
+    return counts
+
+
+def main():
+    results = {n: measure(n) for n in SIZES}
+
+    failed = False
+    for path in PATHS:
+        per_size = [results[n][path] for n in SIZES]
+        ok = len(set(per_size)) == 1
+        failed = failed or not ok
+        status = 'OK' if ok else 'FAIL'
+        detail = ', '.join(f'{n} products: {c} queries' for n, c in zip(SIZES, per_size))
+        print(f'[{status}] {path} -> {detail}')
+
+    if failed:
+        print('\nQuery count depends on catalog size (N+1 detected).')
+        sys.exit(1)
+    print('\nAll listings run a fixed number of queries.')
+
+
+if __name__ == '__main__':
+    main()
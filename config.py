@@ -7,3 +7,34 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         'sqlite:///' + os.path.join(basedir, 'instance', 'inventory.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Seconds cached settings (exchange rate) live in memory, and how often
+    # to poll the shared version counter for changes from other processes
+    # (0 disables polling)
+    SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL') or 300)
+    SETTINGS_CACHE_VERSION_CHECK = float(os.environ.get('SETTINGS_CACHE_VERSION_CHECK') or 5)
+    # Seconds the dashboard metrics are reused; stock movements and sales
+    # invalidate them as soon as they commit
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL') or 60)
+    # Threads rendering queued reports (0 renders inline), where finished
+    # PDFs are cached (default: instance/report_cache) and for how long
+    REPORT_JOB_WORKERS = int(os.environ.get('REPORT_JOB_WORKERS') or 2)
+    REPORT_CACHE_DIR = os.environ.get('REPORT_CACHE_DIR')
+    REPORT_CACHE_MAX_AGE = int(os.environ.get('REPORT_CACHE_MAX_AGE') or 86400)
+    # Processes rendering the sections of multi-section reports (0 = one per CPU,
+    # 1 = serial); reports with fewer table rows than the minimum render serially
+    REPORT_PDF_PROCESSES = int(os.environ.get('REPORT_PDF_PROCESSES') or 0)
+    REPORT_PDF_PARALLEL_MIN_ROWS = int(os.environ.get('REPORT_PDF_PARALLEL_MIN_ROWS') or 20000)
+    # Seconds after which a queued/running job is presumed lost and requeued
+    REPORT_JOB_TIMEOUT = int(os.environ.get('REPORT_JOB_TIMEOUT') or 600)
+    # Login rate limiting: lock a username or IP for LOGIN_LOCKOUT_MINUTES
+    # after LOGIN_MAX_ATTEMPTS failures within LOGIN_ATTEMPT_WINDOW_MINUTES.
+    # 'memory' counts per process; 'redis' shares counters through
+    # LOGIN_LIMITER_REDIS_URL (needs the redis package)
+    LOGIN_MAX_ATTEMPTS = int(os.environ.get('LOGIN_MAX_ATTEMPTS') or 5)
+    LOGIN_ATTEMPT_WINDOW_MINUTES = int(os.environ.get('LOGIN_ATTEMPT_WINDOW_MINUTES') or 15)
+    LOGIN_LOCKOUT_MINUTES = int(os.environ.get('LOGIN_LOCKOUT_MINUTES') or 15)
+    LOGIN_LIMITER_BACKEND = os.environ.get('LOGIN_LIMITER_BACKEND') or 'memory'
+    LOGIN_LIMITER_REDIS_URL = os.environ.get('LOGIN_LIMITER_REDIS_URL') or 'redis://localhost:6379/0'
+    # Seconds between batched writes of login attempts, also the most a crash
+    # can lose (0 writes each one at once); lockouts are written immediately
+    LOGIN_ATTEMPT_FLUSH_INTERVAL = float(os.environ.get('LOGIN_ATTEMPT_FLUSH_INTERVAL') or 0.5)
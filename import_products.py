@@ -0,0 +1,44 @@
+"""
+Bulk product import from a supplier price list (CSV or Excel).
+
+Streams the file and upserts products by part_number in chunks. Stock is
+only taken from the file for new products.
+
+Usage:
+    python import_products.py lista_proveedor.csv [--chunk-size 1000]
+"""
+import argparse
+import sys
+
+from app import create_app
+from app.services.import_service import ProductImportService
+
+def main():
+    parser = argparse.ArgumentParser(description='Importa productos desde CSV o Excel.')
+    parser.add_argument('path', help='CSV or .xlsx file')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        def progress(summary):
+            print(f"  {summary['rows']} rows read, {summary['inserted']} inserted, {summary['updated']} updated...", flush=True)
+
+        try:
+            with open(args.path, 'rb') as stream:
+                rows = ProductImportService.iter_file_rows(stream, args.path)
+                summary = ProductImportService.import_rows(rows, chunk_size=args.chunk_size, progress=progress)
+        except ValueError as e:
+            print(f"ERROR: {e}")
+            sys.exit(1)
+
+    print(f"\nRows:       {summary['rows']}")
+    print(f"Inserted:   {summary['inserted']}")
+    print(f"Updated:    {summary['updated']}")
+    print(f"Rejected:   {summary['rejected']}")
+    print(f"Time:       {summary['seconds']}s ({summary['rows_per_second']} rows/s)")
+    for error in summary['errors']:
+        print(f"  line {error['line']}: {error['error']}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,35 @@
+"""
+Migration script to add the normalized product_compatibility table.
+Creates the table if missing and backfills it by parsing the free-text
+Product.compatibility column. Later writes keep it in sync automatically.
+Safe to re-run: the backfill re-parses every product, which also corrects
+rows written by an older parser (e.g. '1998-05' stored as 1905-1998).
+"""
+from app import create_app, db
+from app.models import ProductCompatibility
+from app.services.compatibility_service import CompatibilityService
+
+def migrate_compatibility():
+    app = create_app()
+
+    with app.app_context():
+        print(f"Migrating database: {db.engine.url}")
+
+        try:
+            print("Creating product_compatibility table if not exists...")
+            ProductCompatibility.__table__.create(db.engine, checkfirst=True)
+
+            print("Parsing Product.compatibility into fitment rows...")
+            total = CompatibilityService.rebuild()
+            db.session.commit()
+            print(f"SUCCESS: {total} fitment rows created.")
+
+            print("\nMigration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"\nERROR: Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_compatibility()
@@ -0,0 +1,72 @@
+"""
+Migration script to add the exchange_rate history table.
+Bs prices are now derived from price_usd and the active rate, so the
+current 'exchange_rate' setting is copied as the first history entry and
+the materialized product.price column is dropped (needs SQLite 3.35+).
+"""
+import sqlite3
+import os
+from datetime import datetime
+
+def migrate_exchange_rates():
+    db_path = 'instance/inventory.db'
+    
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+    
+    print(f"Migrating database: {db_path}")
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='exchange_rate'")
+        if cursor.fetchone():
+            print("SUCCESS: exchange_rate table already exists!")
+        else:
+            print("Creating exchange_rate table...")
+            cursor.execute("""
+                CREATE TABLE exchange_rate (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rate FLOAT NOT NULL,
+                    effective_at DATETIME NOT NULL,
+                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    user_id INTEGER,
+                    FOREIGN KEY(user_id) REFERENCES user(id)
+                )
+            """)
+            cursor.execute("CREATE INDEX ix_exchange_rate_effective_at ON exchange_rate (effective_at)")
+            print("SUCCESS: exchange_rate table created successfully!")
+        
+        cursor.execute("SELECT COUNT(*) FROM exchange_rate")
+        if cursor.fetchone()[0] == 0:
+            cursor.execute("SELECT value FROM setting WHERE key = 'exchange_rate'")
+            row = cursor.fetchone()
+            if row:
+                print(f"Seeding history with current rate {row[0]}...")
+                cursor.execute(
+                    "INSERT INTO exchange_rate (rate, effective_at) VALUES (?, ?)",
+                    (float(row[0]), datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'))
+                )
+        
+        cursor.execute("PRAGMA table_info(product)")
+        if 'price' in [row[1] for row in cursor.fetchall()]:
+            # The model no longer writes this NOT NULL column, so inserts fail while it exists
+            if sqlite3.sqlite_version_info < (3, 35, 0):
+                raise RuntimeError(f"SQLite {sqlite3.sqlite_version} cannot drop product.price; 3.35+ is required")
+            print("Dropping legacy product.price column...")
+            cursor.execute("ALTER TABLE product DROP COLUMN price")
+        
+        conn.commit()
+        print("\nMigration completed successfully!")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_exchange_rates()
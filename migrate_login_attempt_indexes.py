@@ -0,0 +1,55 @@
+"""
+Migration script to add composite indexes for failed-login lookups.
+Creates (username, success, timestamp) and (ip_address, success, timestamp)
+on login_attempt, so each side of get_failed_attempts' username/IP count
+(audit and ad-hoc lookups; logins are checked in memory) is an index range
+scan, and drops the single-column username index they make redundant.
+"""
+import sqlite3
+import os
+
+def migrate_login_attempt_indexes():
+    db_path = 'instance/inventory.db'
+    
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+    
+    print(f"Migrating database: {db_path}")
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='login_attempt'")
+        if not cursor.fetchone():
+            print("ERROR: login_attempt table not found. Run migrate_login_attempts.py first.")
+            return
+        
+        print("Creating index ix_login_attempt_username_success_timestamp...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_login_attempt_username_success_timestamp
+            ON login_attempt (username, success, timestamp)
+        """)
+        print("Creating index ix_login_attempt_ip_success_timestamp...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_login_attempt_ip_success_timestamp
+            ON login_attempt (ip_address, success, timestamp)
+        """)
+        print("Dropping redundant index ix_login_attempt_username...")
+        cursor.execute("DROP INDEX IF EXISTS ix_login_attempt_username")
+        cursor.execute("ANALYZE login_attempt")
+        
+        conn.commit()
+        print("SUCCESS: login_attempt indexes created.")
+        print("\nMigration completed successfully!")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_login_attempt_indexes()
@@ -36,8 +36,15 @@ def migrate_login_attempts():
             """)
             
             # Create indexes for performance
-            cursor.execute("CREATE INDEX ix_login_attempt_username ON login_attempt (username)")
             cursor.execute("CREATE INDEX ix_login_attempt_timestamp ON login_attempt (timestamp)")
+            cursor.execute("""
+                CREATE INDEX ix_login_attempt_username_success_timestamp
+                ON login_attempt (username, success, timestamp)
+            """)
+            cursor.execute("""
+                CREATE INDEX ix_login_attempt_ip_success_timestamp
+                ON login_attempt (ip_address, success, timestamp)
+            """)
             
             print("SUCCESS: login_attempt table created successfully!")
         
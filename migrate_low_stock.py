@@ -0,0 +1,62 @@
+"""
+Migration script to add the maintained low-stock flag to products.
+Adds is_low_stock and low_stock_since, backfills them from quantity and
+min_stock, and creates a partial index over active low-stock products.
+"""
+import sqlite3
+import os
+from datetime import datetime
+
+def migrate_low_stock():
+    db_path = 'instance/inventory.db'
+    
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+    
+    print(f"Migrating database: {db_path}")
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(product)")
+        columns = [row[1] for row in cursor.fetchall()]
+        
+        if 'is_low_stock' not in columns:
+            print("Adding is_low_stock column...")
+            cursor.execute("ALTER TABLE product ADD COLUMN is_low_stock BOOLEAN NOT NULL DEFAULT 0")
+        if 'low_stock_since' not in columns:
+            print("Adding low_stock_since column...")
+            cursor.execute("ALTER TABLE product ADD COLUMN low_stock_since DATETIME")
+        
+        print("Backfilling low-stock flags...")
+        cursor.execute("""
+            UPDATE product SET
+                is_low_stock = (quantity <= COALESCE(min_stock, 0)),
+                low_stock_since = CASE
+                    WHEN quantity <= COALESCE(min_stock, 0) THEN COALESCE(low_stock_since, ?)
+                    ELSE NULL
+                END
+        """, (datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f'),))
+        
+        print("Creating partial index ix_product_low_stock...")
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_product_low_stock ON product (low_stock_since, id)
+            WHERE is_active = 1 AND is_low_stock = 1
+        """)
+        
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM product WHERE is_active = 1 AND is_low_stock = 1")
+        print(f"SUCCESS: {cursor.fetchone()[0]} active products flagged as low stock.")
+        print("\nMigration completed successfully!")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_low_stock()
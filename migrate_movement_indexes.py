@@ -0,0 +1,44 @@
+"""
+Migration script to index the inventory movement ledger.
+Adds (product_id, date) for per-product history and (date) for the
+paginated, date-ordered ledger.
+"""
+import sqlite3
+import os
+
+INDEXES = (
+    ('ix_inventory_movement_product_date', 'inventory_movement (product_id, date)'),
+    ('ix_inventory_movement_date', 'inventory_movement (date)'),
+)
+
+def migrate_movement_indexes():
+    db_path = 'instance/inventory.db'
+
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+
+    print(f"Migrating database: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        for name, definition in INDEXES:
+            print(f"Creating index {name} if not exists...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+        cursor.execute("ANALYZE inventory_movement")
+        conn.commit()
+        print("SUCCESS: Ledger indexes created.")
+        print("\nMigration completed successfully!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_movement_indexes()
@@ -0,0 +1,58 @@
+"""
+Migration script to create the report_job table used by the background
+report queue, and to add product.updated_at, part of the report data
+version. Finished PDFs live in instance/report_cache, keyed by report type,
+parameters and the report data version.
+"""
+import sqlite3
+import os
+
+def migrate_report_jobs():
+    db_path = 'instance/inventory.db'
+    
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+    
+    print(f"Migrating database: {db_path}")
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        print("Creating report_job table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS report_job (
+                id INTEGER NOT NULL PRIMARY KEY,
+                report_type VARCHAR(30) NOT NULL,
+                params TEXT NOT NULL,
+                cache_key VARCHAR(64) NOT NULL,
+                status VARCHAR(20) NOT NULL,
+                progress INTEGER NOT NULL,
+                error VARCHAR(200),
+                user_id INTEGER REFERENCES user (id),
+                created_at DATETIME,
+                started_at DATETIME,
+                finished_at DATETIME
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_report_job_cache_key ON report_job (cache_key)")
+        
+        cursor.execute("PRAGMA table_info(product)")
+        if 'updated_at' not in [row[1] for row in cursor.fetchall()]:
+            print("Adding product.updated_at column...")
+            cursor.execute("ALTER TABLE product ADD COLUMN updated_at DATETIME")
+        
+        conn.commit()
+        print("SUCCESS: report_job table ready.")
+        print("\nMigration completed successfully!")
+        
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_report_jobs()
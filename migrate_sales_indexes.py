@@ -0,0 +1,43 @@
+"""
+Migration script to index sales by date.
+Serves the sales summary cards (today / this month) and the keyset
+paginated sales history.
+"""
+import sqlite3
+import os
+
+INDEXES = (
+    ('ix_sale_date', 'sale (date)'),
+)
+
+def migrate_sales_indexes():
+    db_path = 'instance/inventory.db'
+
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+
+    print(f"Migrating database: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        for name, definition in INDEXES:
+            print(f"Creating index {name} if not exists...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {definition}")
+
+        cursor.execute("ANALYZE sale")
+        conn.commit()
+        print("SUCCESS: Sales indexes created.")
+        print("\nMigration completed successfully!")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_sales_indexes()
@@ -0,0 +1,46 @@
+"""
+Migration script to add the product full-text search index (SQLite FTS5).
+Creates the product_fts table and its sync triggers, then backfills it
+from the existing product table. Safe to run more than once.
+"""
+import sqlite3
+import os
+
+from app.services.search_service import FTS_DDL, FTS_REBUILD
+
+def migrate_search_index():
+    db_path = 'instance/inventory.db'
+
+    if not os.path.exists(db_path):
+        print("Database file not found. Please run the application first to create the database.")
+        return
+
+    print(f"Migrating database: {db_path}")
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        print("Creating product_fts table and triggers...")
+        for statement in FTS_DDL:
+            cursor.execute(statement)
+
+        print("Rebuilding search index from product table...")
+        for statement in FTS_REBUILD:
+            cursor.execute(statement)
+
+        cursor.execute("SELECT COUNT(*) FROM product_fts")
+        print(f"SUCCESS: {cursor.fetchone()[0]} products indexed.")
+
+        conn.commit()
+        print("\nMigration completed successfully! Restart the application to enable indexed search.")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"\nERROR: Migration failed: {str(e)}")
+        raise
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate_search_index()
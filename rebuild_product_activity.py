@@ -0,0 +1,34 @@
+"""
+Rebuilds the product_activity summary (last movement, last sale and
+30/60/90-day units out) from the movement and sales history.
+Creates the table if missing. Movements keep it up to date, but the
+rolling windows only age out on a rebuild, so schedule this nightly, e.g.:
+
+    0 3 * * * cd /path/to/app && python rebuild_product_activity.py
+"""
+from app import create_app, db
+from app.models import ProductActivity
+from app.services.activity_service import ActivityService
+
+def rebuild_product_activity():
+    app = create_app()
+
+    with app.app_context():
+        print(f"Rebuilding activity summary: {db.engine.url}")
+
+        try:
+            print("Creating product_activity table if not exists...")
+            ProductActivity.__table__.create(db.engine, checkfirst=True)
+
+            print("Recomputing from inventory movements and sales...")
+            total = ActivityService.rebuild()
+            db.session.commit()
+            print(f"SUCCESS: {total} products summarized.")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"\nERROR: Rebuild failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    rebuild_product_activity()
@@ -0,0 +1,32 @@
+"""
+Rebuilds the daily sales rollups (sales_daily and sales_daily_item) from
+the full sales history. Creates the tables if missing. New sales keep the
+rollups up to date; run this after migrating or after editing past sales.
+"""
+from app import create_app, db
+from app.models import SalesDaily, SalesDailyItem
+from app.services.sales_rollup_service import SalesRollupService
+
+def rebuild_sales_rollup():
+    app = create_app()
+
+    with app.app_context():
+        print(f"Rebuilding sales rollup: {db.engine.url}")
+
+        try:
+            print("Creating rollup tables if not exist...")
+            SalesDaily.__table__.create(db.engine, checkfirst=True)
+            SalesDailyItem.__table__.create(db.engine, checkfirst=True)
+
+            print("Aggregating sales by day, product and seller...")
+            days = SalesRollupService.rebuild()
+            db.session.commit()
+            print(f"SUCCESS: {days} days with sales summarized.")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"\nERROR: Rebuild failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    rebuild_sales_rollup()
@@ -0,0 +1,123 @@
+"""
+Concurrency stress test for stock decrements.
+
+Several threads sell the same product one unit at a time until it runs out.
+With the atomic InventoryService path the number of successful sales must
+equal the initial stock and the product must end at exactly 0. Run with
+--legacy to see the old read-check-write logic oversell.
+
+Usage:
+    python stress_stock.py [--threads 8] [--stock 200] [--legacy]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+
+from config import Config
+from app import create_app, db
+
+
+def build_app(db_path):
+    class StressConfig(Config):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + db_path
+        SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'timeout': 30}}
+        TESTING = True
+
+    return create_app(StressConfig)
+
+
+def legacy_remove_stock(product_id, quantity, description, user_id):
+    """The original read-check-write logic, kept here for comparison."""
+    from app.models import Product, InventoryMovement
+
+    product = db.session.get(Product, product_id)
+    if product.quantity < quantity:
+        raise ValueError("Stock insuficiente.")
+    time.sleep(0)  # Yield to other threads, as a slow request would
+    product.quantity -= quantity
+    db.session.add(InventoryMovement(product_id=product_id, type='salida', quantity=quantity,
+                                     description=description, user_id=user_id))
+
+
+def worker(app, remove_stock, product_id, user_id, stats, lock):
+    sold = retries = 0
+    with app.app_context():
+        while True:
+            try:
+                remove_stock(product_id, 1, 'Venta de prueba', user_id)
+                db.session.commit()
+                sold += 1
+            except ValueError:
+                db.session.rollback()
+                break
+            except OperationalError:
+                # SQLite busy: another writer held the lock past the timeout
+                db.session.rollback()
+                retries += 1
+        db.session.remove()
+    with lock:
+        stats['sold'] += sold
+        stats['retries'] += retries
+
+
+def main():
+    from app.models import User, Product, InventoryMovement
+    from app.services.inventory_service import InventoryService
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--stock', type=int, default=200)
+    parser.add_argument('--legacy', action='store_true', help='use the old read-check-write path')
+    args = parser.parse_args()
+
+    app = build_app(os.path.join(tempfile.mkdtemp(), 'stress.db'))
+    with app.app_context():
+        db.create_all()
+        user = User(username='stress', email='stress@example.com', role='seller')
+        user.set_password('stress')
+        product = Product(name='Bujía', quantity=args.stock, price_usd=5.0)
+        db.session.add_all([user, product])
+        db.session.commit()
+        user_id, product_id = user.id, product.id
+
+    remove_stock = legacy_remove_stock if args.legacy else InventoryService.remove_stock
+    stats = {'sold': 0, 'retries': 0}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=worker, args=(app, remove_stock, product_id, user_id, stats, lock))
+        for _ in range(args.threads)
+    ]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    with app.app_context():
+        final_qty = db.session.get(Product, product_id).quantity
+        movements = InventoryMovement.query.filter_by(product_id=product_id).count()
+
+    print(f"Path:            {'legacy' if args.legacy else 'atomic'}")
+    print(f'Threads:         {args.threads}')
+    print(f'Initial stock:   {args.stock}')
+    print(f"Sales recorded:  {stats['sold']} ({movements} movements)")
+    print(f'Final stock:     {final_qty}')
+    print(f"Busy retries:    {stats['retries']}")
+    print(f"Throughput:      {stats['sold'] / elapsed:.1f} sales/s")
+
+    consistent = final_qty >= 0 and stats['sold'] == args.stock and final_qty == 0 and movements == args.stock
+    if not consistent:
+        print(f"\nFAIL: oversold by {stats['sold'] - args.stock} units.")
+        sys.exit(1)
+    print('\nOK: stock never went negative and no unit was sold twice.')
+
+
+if __name__ == '__main__':
+    main()